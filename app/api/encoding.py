@@ -0,0 +1,88 @@
+from datetime import datetime, time
+from typing import Any, Dict
+from uuid import UUID
+import msgpack
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+from app.core.time_parser import hours_minute_range
+from app.db import models
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+# OpenAPI entry for endpoints that can also answer in MessagePack
+MSGPACK_RESPONSES = {200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return value.bytes
+    if isinstance(value, (datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def __init__(self, content: Any, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True, default=_encode_default)
+
+
+def vary_on_accept(response: Response) -> None:
+    """Mark a negotiated response as varying by Accept, for shared caches"""
+    response.headers.add_vary_header("Accept")
+
+
+def _accept_qualities(accept: str) -> Dict[str, float]:
+    """Media range -> q-value from an Accept header"""
+    qualities: Dict[str, float] = {}
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type] = max(quality, qualities.get(media_type, 0.0))
+    return qualities
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client prefers MessagePack to JSON in its Accept header
+
+    MessagePack has to be named explicitly, with a q-value strictly higher than
+    JSON gets from application/json, or failing that application/* or */*.
+    """
+    qualities = _accept_qualities(request.headers.get("accept", ""))
+    msgpack_quality = max(qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES)
+    json_quality = 0.0
+    for json_range in ("application/json", "application/*", "*/*"):
+        if json_range in qualities:
+            json_quality = qualities[json_range]
+            break
+    return msgpack_quality > json_quality
+
+
+def compact_restaurant(restaurant: models.Restaurant) -> dict:
+    """Restaurant with a 16-byte id and hours as [start, end) local minute-of-week pairs"""
+    return {
+        "id": restaurant.id.bytes,
+        "name": restaurant.name,
+        "timezone": restaurant.timezone or settings.DEFAULT_TIMEZONE,
+        "hours": [
+            list(hours_minute_range(h.day_of_week, h.open_time, h.close_time))
+            for h in restaurant.hours
+        ],
+    }
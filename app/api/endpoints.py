@@ -1,37 +1,156 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from app.api.encoding import (
+    MSGPACK_RESPONSES,
+    MsgPackResponse,
+    compact_restaurant,
+    vary_on_accept,
+    wants_msgpack,
+)
+from app.core.config import settings
+from app.core.time_parser import datetime_minute_of_week
 from app.db.database import get_db
+from app.db import models, query_log
 from app.schemas import restaurant as schemas
 from app.services import restaurant as restaurant_service
 from app.services import cache as cache_service
+from app.services import cache_warmer
+from app.services import csv_sync
+from app.services import schedule_index
+from app.services import utc_schedule
+from app.services import occupancy as occupancy_service
 
 router = APIRouter()
 
 
-@router.get("/restaurants/open", response_model=List[str])
+def _data_changed(db: Session, restaurant: Optional[models.Restaurant] = None) -> None:
+    """Refresh derived data after a restaurant is created, updated or deleted
+
+    The data version moves first, so every worker's index goes stale at once;
+    the cache is only cleared once this worker's index is republished.
+    """
+    cache_service.bump_data_version()
+    schedule_index.rebuild_index(db)
+    if restaurant is not None:
+        # Deleted restaurants lose their UTC schedule rows by cascade
+        utc_schedule.rebuild(db, [restaurant])
+    cache_service.invalidate_cache()
+    cache_warmer.trigger()
+
+
+@router.get(
+    "/restaurants/open",
+    response_model=List[str],
+    responses=MSGPACK_RESPONSES,
+    dependencies=[Depends(vary_on_accept)],
+)
 def get_open_restaurants(
-    datetime: str, use_cache: bool = True, db: Session = Depends(get_db)
+    request: Request,
+    datetime: str,
+    use_cache: bool = True,
+    db: Session = Depends(get_db),
 ):
-    """Get all restaurants open at the specified datetime"""
+    """Get all restaurants open at the specified datetime
+
+    A datetime with an offset (e.g. "2024-03-15T23:30:00Z") is matched against
+    each restaurant's hours in its own timezone. A naive datetime is compared
+    with every restaurant's local wall-clock hours as given.
+    """
     try:
-        if use_cache:
-            # Check cache first
-            cached_result = cache_service.get_cached_restaurants(datetime)
-            if cached_result is not None:
-                return cached_result
+        restaurants = _find_open_restaurants(datetime, use_cache, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # Query database
+    if wants_msgpack(request):
+        return MsgPackResponse(restaurants)
+    return restaurants
+
+
+def _find_open_restaurants(datetime: str, use_cache: bool, db: Session) -> List[str]:
+    dt = restaurant_service.parse_query_datetime(datetime)
+    if dt.tzinfo is not None:
+        # The minute-of-week cache and schedule index are in local wall-clock time
+        return utc_schedule.get_open_restaurants(db, dt)
+
+    minute = datetime_minute_of_week(dt)
+    cache_warmer.record_request(minute)
+
+    if use_cache:
+        # Check cache first
+        cached_result = cache_service.get_cached_restaurants(minute)
+        if cached_result is not None:
+            return cached_result
+
+    # Try the shared schedule index before falling back to the database
+    version = cache_service.get_data_version()
+    restaurants = schedule_index.get_open_restaurants(dt, version)
+    if restaurants is None:
         restaurants = restaurant_service.get_open_restaurants(db, datetime)
 
-        if use_cache:
-            # Cache the result
-            cache_service.set_cached_restaurants(datetime, restaurants)
+    if use_cache:
+        # Cache the result
+        cache_service.set_cached_restaurants(minute, restaurants, version)
+
+    return restaurants
+
 
-        return restaurants
+@router.get(
+    "/restaurants/occupancy",
+    response_model=schemas.WeeklyOccupancy,
+    responses=MSGPACK_RESPONSES,
+    dependencies=[Depends(vary_on_accept)],
+)
+def get_weekly_occupancy(
+    request: Request, slot_minutes: int = 15, db: Session = Depends(get_db)
+):
+    """Count open restaurants for every slot of the week"""
+    try:
+        counts = occupancy_service.weekly_occupancy(
+            restaurant_service.get_hours_rows(db), slot_minutes
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    result = {"slot_minutes": slot_minutes, "counts": counts}
+    if wants_msgpack(request):
+        return MsgPackResponse(result)
+    return result
+
+
+@router.get(
+    "/restaurants/timeline",
+    response_model=schemas.Timeline,
+    responses=MSGPACK_RESPONSES,
+    dependencies=[Depends(vary_on_accept)],
+)
+def get_open_timeline(
+    request: Request,
+    start: str,
+    end: str,
+    slot_minutes: int = 15,
+    db: Session = Depends(get_db),
+):
+    """Open restaurants for every slot in a date range, as opened/closed events
+
+    Datetimes with an offset are checked in each restaurant's own timezone,
+    like /restaurants/open.
+    """
+    try:
+        result = occupancy_service.timeline(
+            restaurant_service.get_hours_rows(db),
+            restaurant_service.parse_query_datetime(start),
+            restaurant_service.parse_query_datetime(end),
+            slot_minutes,
+            restaurant_service.get_timezones(db),
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if wants_msgpack(request):
+        return MsgPackResponse(result)
+    return result
+
 
 @router.post("/restaurants/", response_model=schemas.Restaurant)
 def create_restaurant(
@@ -43,7 +162,7 @@ def create_restaurant(
         raise HTTPException(status_code=400, detail="Restaurant already exists")
 
     result = restaurant_service.create_restaurant(db, restaurant)
-    cache_service.invalidate_cache()
+    _data_changed(db, result)
     return result
 
 
@@ -56,7 +175,7 @@ def update_restaurant(
     if db_restaurant is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    cache_service.invalidate_cache()
+    _data_changed(db, db_restaurant)
     return db_restaurant
 
 
@@ -67,14 +186,36 @@ def delete_restaurant(name: str, db: Session = Depends(get_db)):
     if not success:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    cache_service.invalidate_cache()
+    _data_changed(db)
     return {"message": "Restaurant deleted successfully"}
 
 
-@router.get("/restaurants/", response_model=List[schemas.Restaurant])
-def get_all_restaurants(db: Session = Depends(get_db)):
-    """Get all restaurants"""
-    return restaurant_service.get_all_restaurants(db)
+@router.get(
+    "/restaurants/",
+    response_model=List[schemas.Restaurant],
+    responses=MSGPACK_RESPONSES,
+    dependencies=[Depends(vary_on_accept)],
+)
+def get_all_restaurants(request: Request, db: Session = Depends(get_db)):
+    """Get all restaurants
+
+    MessagePack responses use 16-byte ids and hours as [start, end) minute-of-week pairs.
+    """
+    restaurants = restaurant_service.get_all_restaurants(db)
+    if wants_msgpack(request):
+        return MsgPackResponse([compact_restaurant(r) for r in restaurants])
+    return restaurants
+
+
+@router.post("/admin/sync-csv")
+def sync_csv(db: Session = Depends(get_db)):
+    """Apply changes from the CSV feed without a restart"""
+    try:
+        return csv_sync.sync_csv(db)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/debug/data-loading")
@@ -113,9 +254,50 @@ def clear_cache():
 @router.get("/debug/cache/{datetime}")
 def check_cache(datetime: str):
     """Check what's in the cache for a given datetime"""
-    cached = cache_service.get_cached_restaurants(datetime)
+    try:
+        dt = restaurant_service.parse_query_datetime(datetime)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cached = cache_service.get_cached_restaurants(datetime_minute_of_week(dt))
     return {
         "datetime": datetime,
         "cached_data": cached,
         "is_cached": cached is not None,
     }
+
+
+@router.get("/debug/schedule-index")
+def check_schedule_index():
+    """Show the shared schedule index generation mapped by this worker"""
+    return schedule_index.index_status()
+
+
+@router.get("/debug/utc-schedule")
+def check_utc_schedule(db: Session = Depends(get_db)):
+    """Show the span and size of the precomputed UTC schedule"""
+    return utc_schedule.schedule_status(db)
+
+
+@router.get("/debug/slow-queries")
+def get_slow_queries():
+    """Statements over the slow-query threshold, newest first, with their plans"""
+    return {
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "queries": query_log.get_slow_queries(),
+    }
+
+
+@router.post("/debug/slow-queries/clear")
+def clear_slow_queries():
+    """Empty the slow-query log"""
+    query_log.clear_slow_queries()
+    return {"message": "Slow-query log cleared"}
+
+
+@router.get("/debug/index-usage")
+def get_index_usage(db: Session = Depends(get_db)):
+    """Scans per index compared with the writes on its table"""
+    try:
+        return query_log.get_index_usage(db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
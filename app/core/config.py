@@ -1,17 +1,53 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Liine Restaurant API"
+    # "postgres", a SQLite file at SQLITE_PATH, or an in-process SQLite database
+    DATABASE_BACKEND: Literal["postgres", "sqlite", "memory"] = "postgres"
+    SQLITE_PATH: str = "restaurants.db"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_SERVER: str = "db"
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "restaurant_db"
     REDIS_URL: str = "redis://redis:6379"
+    # "redis", or a per-process in-memory cache that needs no server
+    CACHE_BACKEND: Literal["redis", "memory"] = "redis"
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    # Base path of the shared-memory schedule index (e.g. /dev/shm/liine-schedule).
+    # Empty disables the index and every lookup goes to the database.
+    SCHEDULE_INDEX_PATH: str = ""
+    # Statements slower than this are kept in the slow-query log with their plan
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN: bool = True
+    # CSV feed synced on startup, on file change and via /admin/sync-csv
+    CSV_PATH: str = "restaurants.csv"
+    CSV_SYNC_BATCH_SIZE: int = 100
+    CSV_WATCH_ENABLED: bool = True
+    CSV_WATCH_INTERVAL_SECONDS: float = 5.0
+    # Timezone of restaurants created without one, including the CSV feed
+    DEFAULT_TIMEZONE: str = "America/New_York"
+    # Window of the precomputed UTC schedule used for timezone-aware lookups
+    UTC_SCHEDULE_PAST_DAYS: int = 7
+    UTC_SCHEDULE_FUTURE_DAYS: int = 56
+    UTC_SCHEDULE_REFRESH_SECONDS: float = 3600.0
+    # Background warming of /restaurants/open cache buckets
+    CACHE_WARM_ENABLED: bool = True
+    CACHE_WARM_ALL_BUCKETS: bool = True  # False warms only recently requested buckets
+    CACHE_WARM_BATCH_SIZE: int = 500
+    CACHE_WARM_BATCHES_PER_SECOND: float = 5.0
+    CACHE_WARM_INTERVAL_SECONDS: float = 3000.0  # Re-warm before the 1 hour TTL
 
     @property
     def SQLALCHEMY_DATABASE_URL(self) -> str:
+        if self.DATABASE_BACKEND == "memory":
+            return "sqlite://"
+        if self.DATABASE_BACKEND == "sqlite":
+            return f"sqlite:///{self.SQLITE_PATH}"
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
 
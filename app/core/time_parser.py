@@ -1,5 +1,5 @@
-from datetime import time
-from typing import List, NamedTuple
+from datetime import datetime, time
+from typing import List, NamedTuple, Tuple
 import re
 import logging
 
@@ -111,3 +111,59 @@ def parse_hours_string(hours_str: str) -> List[HoursEntry]:
             raise ValueError(f"Error parsing schedule '{schedule}': {str(e)}")
 
     return entries
+
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def to_day_of_week(dt: datetime) -> int:
+    """Convert a datetime's weekday to our format (0=Sunday, ..., 6=Saturday)"""
+    return (dt.weekday() + 1) % 7
+
+
+def minute_of_week(day_of_week: int, t: time) -> int:
+    """Minutes since Sunday 00:00 for the given day (0=Sunday) and time"""
+    return day_of_week * MINUTES_PER_DAY + t.hour * 60 + t.minute
+
+
+def datetime_minute_of_week(dt: datetime) -> int:
+    """Minute-of-week bucket for a datetime, using its own wall-clock time"""
+    return minute_of_week(to_day_of_week(dt), dt.time())
+
+
+def hours_minute_range(
+    day_of_week: int, open_time: time, close_time: time
+) -> Tuple[int, int]:
+    """Compact [start, end) minute-of-week pair for one hours entry
+
+    Overnight hours end past the next midnight, so a Saturday overnight entry
+    ends past the end of the week; consumers take the end modulo MINUTES_PER_WEEK.
+    """
+    start = minute_of_week(day_of_week, open_time)
+    end = minute_of_week(day_of_week, close_time)
+    if close_time < open_time:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def week_intervals(
+    day_of_week: int, open_time: time, close_time: time
+) -> List[Tuple[int, int]]:
+    """Expand one hours entry into half-open [start, end) minute-of-week intervals
+
+    Mirrors the open-restaurant query: overnight hours (close before open) spill
+    into the next day, wrapping from Saturday into Sunday, and an entry whose
+    open and close times are equal is never open.
+    """
+    start = minute_of_week(day_of_week, open_time)
+    if close_time > open_time:
+        return [(start, minute_of_week(day_of_week, close_time))]
+    if close_time < open_time:
+        next_day = (day_of_week + 1) % 7
+        intervals = [(start, (day_of_week + 1) * MINUTES_PER_DAY)]
+        end = minute_of_week(next_day, close_time)
+        if end > next_day * MINUTES_PER_DAY:
+            intervals.append((next_day * MINUTES_PER_DAY, end))
+        return intervals
+    return []
@@ -1,8 +1,66 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import MetaData, create_engine, event, inspect, text
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+class _ConnectionGuard:
+    """Hand the single in-memory connection to one session at a time
+
+    Held from pool checkout to checkin, i.e. for a session's whole transaction.
+    Without it a session closing in one thread resets (rolls back) the shared
+    connection under a transaction still open in another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner: Optional[int] = None
+
+    def acquire(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        if self._owner == threading.get_ident():
+            # A second session in the same thread would share, and reset, the transaction
+            raise RuntimeError(
+                "Nested sessions in one thread are not supported by the memory backend"
+            )
+        self._lock.acquire()
+        self._owner = threading.get_ident()
+
+    def release(self, dbapi_connection, connection_record) -> None:
+        self._owner = None
+        self._lock.release()
+
+
+def _create_engine():
+    if settings.DATABASE_BACKEND == "postgres":
+        return create_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+    # SQLite connections are shared with the cache warmer and CSV watcher threads.
+    # The in-memory database lives in a single connection, so every session shares
+    # it, one at a time.
+    sqlite_engine = create_engine(
+        settings.SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if settings.DATABASE_BACKEND == "memory" else None,
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    if settings.DATABASE_BACKEND == "memory":
+        guard = _ConnectionGuard()
+        event.listen(sqlite_engine, "checkout", guard.acquire)
+        event.listen(sqlite_engine, "checkin", guard.release)
+
+    return sqlite_engine
+
+
+engine = _create_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -13,3 +71,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def add_missing_columns(metadata: MetaData) -> None:
+    """Add nullable columns that create_all skips because their table already exists"""
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {column_type}"
+                    )
+                )
+
+
+@contextmanager
+def advisory_lock(db: Session, lock_id: int) -> Iterator[None]:
+    """Serialise a job across workers with a Postgres advisory lock
+
+    The lock is session-level and held on its own connection, since the session
+    may switch connections between commits. Other backends run unlocked.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        yield
+        return
+    with bind.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": lock_id})
+        lock_conn.commit()
+        try:
+            yield
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+            lock_conn.commit()
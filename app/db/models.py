@@ -1,6 +1,14 @@
 import uuid
-from sqlalchemy import Column, String, SmallInteger, Time, ForeignKey, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Column,
+    DateTime,
+    String,
+    SmallInteger,
+    Time,
+    ForeignKey,
+    Index,
+    Uuid,
+)
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -8,19 +16,23 @@ from app.db.database import Base
 class Restaurant(Base):
     __tablename__ = "restaurants"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True, index=True)
+    timezone = Column(String, nullable=True)  # IANA name; NULL means DEFAULT_TIMEZONE
     hours = relationship(
         "RestaurantHours", back_populates="restaurant", cascade="all, delete-orphan"
     )
+    utc_hours = relationship(
+        "RestaurantUtcHours", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class RestaurantHours(Base):
     __tablename__ = "restaurant_hours"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     restaurant_id = Column(
-        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE")
+        Uuid(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE")
     )
     day_of_week = Column(SmallInteger)  # 0=Sunday, 1=Monday, ..., 6=Saturday
     open_time = Column(Time)
@@ -46,3 +58,43 @@ class RestaurantHours(Base):
             "restaurant_id",
         ),
     )
+
+
+# Opening hours shifted to UTC minute-of-week (0 = Sunday 00:00 UTC). The UTC
+# offsets used hold for [valid_from, valid_until), naive UTC datetimes that are
+# cut at every DST transition of the restaurant's timezone.
+class RestaurantUtcHours(Base):
+    __tablename__ = "restaurant_utc_hours"
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    restaurant_id = Column(
+        Uuid(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE")
+    )
+    start_minute = Column(SmallInteger)
+    end_minute = Column(SmallInteger)  # Exclusive, at most 10080
+    valid_from = Column(DateTime)
+    valid_until = Column(DateTime)
+
+    __table_args__ = (
+        # Covering index so an aware lookup is one range scan
+        Index(
+            "idx_utc_hours_search",
+            "start_minute",
+            "end_minute",
+            "valid_from",
+            "valid_until",
+            "restaurant_id",
+        ),
+        Index("idx_utc_hours_restaurant", "restaurant_id"),
+        # Bounds of the precomputed horizon
+        Index("idx_utc_hours_valid_from", "valid_from"),
+        Index("idx_utc_hours_valid_until", "valid_until"),
+    )
+
+
+# Hash of the CSV row each feed-managed restaurant was last synced from
+class RestaurantSourceHash(Base):
+    __tablename__ = "restaurant_source_hashes"
+
+    name = Column(String, primary_key=True)
+    row_hash = Column(String(64), nullable=False)
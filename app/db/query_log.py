@@ -0,0 +1,254 @@
+import itertools
+import json
+import queue
+import re
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_entries: deque = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+_entry_ids = itertools.count(1)
+_explain_queue: "queue.Queue" = queue.Queue(maxsize=settings.SLOW_QUERY_LOG_SIZE)
+_explain_thread: Optional[threading.Thread] = None
+_explain_lock = threading.Lock()
+# Statements issued by the EXPLAIN worker itself are never timed
+_worker_state = threading.local()
+_installed = False
+
+# EXPLAIN ANALYZE runs the statement again, so it is only used for plain reads.
+# Any other function call (pg_advisory_lock, nextval, ...) may have side effects.
+_READ_ONLY_FUNCTIONS = {
+    "avg", "cast", "coalesce", "count", "lower", "max", "min", "sum", "upper",
+}
+# Keywords that can be followed by "(" without being a function call
+_PAREN_KEYWORDS = {
+    "all", "and", "any", "as", "distinct", "exists", "filter", "from", "in",
+    "join", "not", "on", "or", "over", "select", "using", "values", "where",
+}
+_CALL_PATTERN = re.compile(r"\b([a-z_][a-z0-9_]*)\s*\(", re.IGNORECASE)
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+\"?([a-z_][a-z0-9_]*)", re.IGNORECASE)
+# Writes, including those inside a CTE, and row locks (FOR UPDATE / FOR SHARE)
+_WRITE_PATTERN = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|SHARE)\b", re.IGNORECASE)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+    if getattr(_worker_state, "explaining", False):
+        return
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    entry = {
+        "id": next(_entry_ids),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 3),
+        "statement": statement,
+        "parameters": _printable(parameters),
+        "executemany": executemany,
+        "plan": None,
+        "explain_error": None,
+    }
+    _entries.append(entry)
+    logger.warning(f"Slow query ({duration_ms:.1f} ms): {statement}")
+
+    if settings.SLOW_QUERY_EXPLAIN and not executemany:
+        _queue_explain(conn.engine, entry, statement, parameters)
+
+
+def _handle_error(context) -> None:
+    if context.connection is None:
+        return
+    start_times = context.connection.info.get("query_start_time")
+    if start_times:
+        start_times.pop()
+
+
+def _printable(parameters: Any) -> Any:
+    """Make statement parameters JSON-safe for the debug endpoint"""
+    if isinstance(parameters, dict):
+        return {key: _printable(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_printable(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (bool, int, float, str)):
+        return parameters
+    return str(parameters)
+
+
+def _queue_explain(engine: Engine, entry: dict, statement: str, parameters) -> None:
+    global _explain_thread
+    if engine.dialect.name != "postgresql":
+        entry["explain_error"] = "EXPLAIN capture is only supported on PostgreSQL"
+        return
+    try:
+        _explain_queue.put_nowait((engine, entry, statement, parameters))
+    except queue.Full:
+        entry["explain_error"] = "EXPLAIN queue full, plan not captured"
+        return
+
+    with _explain_lock:
+        if _explain_thread is None or not _explain_thread.is_alive():
+            _explain_thread = threading.Thread(
+                target=_explain_worker, name="slow-query-explain", daemon=True
+            )
+            _explain_thread.start()
+
+
+def _explain_worker() -> None:
+    """Capture plans on a separate connection so request latency is unaffected"""
+    _worker_state.explaining = True
+    while True:
+        engine, entry, statement, parameters = _explain_queue.get()
+        try:
+            entry["plan"] = _explain(engine, statement, parameters)
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        finally:
+            _explain_queue.task_done()
+
+
+def _app_tables() -> set:
+    from app.db.database import Base
+
+    return set(Base.metadata.tables)
+
+
+def _is_plain_read(statement: str) -> bool:
+    """Whether a statement only reads the app's tables, so ANALYZE can re-run it"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return False
+    if _WRITE_PATTERN.search(statement):
+        return False
+    for name in _CALL_PATTERN.findall(statement):
+        name = name.lower()
+        if name not in _READ_ONLY_FUNCTIONS and name not in _PAREN_KEYWORDS:
+            return False
+    tables = {name.lower() for name in _TABLE_PATTERN.findall(statement)}
+    return bool(tables) and tables <= _app_tables()
+
+
+def _explain(engine: Engine, statement: str, parameters) -> Any:
+    # ANALYZE executes the statement, so only do it for plain reads; everything
+    # else gets the estimated plan. Either way the transaction is rolled back.
+    if _is_plain_read(statement):
+        options = "ANALYZE, BUFFERS, FORMAT JSON"
+    else:
+        options = "FORMAT JSON"
+    with engine.connect() as conn:
+        try:
+            result = conn.exec_driver_sql(
+                f"EXPLAIN ({options}) {statement}", parameters or ()
+            )
+            plan = result.scalar()
+        finally:
+            conn.rollback()
+            # Session-level advisory locks survive a rollback; never return a
+            # connection to the pool holding one
+            conn.exec_driver_sql("SELECT pg_advisory_unlock_all()")
+            conn.rollback()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def install() -> None:
+    """Time every statement on every engine and record the slow ones"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
+
+
+def wait_for_explains() -> None:
+    """Block until every queued EXPLAIN has been captured"""
+    _explain_queue.join()
+
+
+def get_slow_queries() -> List[dict]:
+    """Recorded slow queries, newest first"""
+    return list(reversed(_entries))
+
+
+def clear_slow_queries() -> None:
+    _entries.clear()
+
+
+def _plan_index_names(plan: Any) -> List[str]:
+    """Collect every 'Index Name' referenced in an EXPLAIN JSON plan"""
+    names = []
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.append(plan["Index Name"])
+        for value in plan.values():
+            names.extend(_plan_index_names(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            names.extend(_plan_index_names(value))
+    return names
+
+
+def get_index_usage(db) -> Dict[str, Any]:
+    """Report how often each index is scanned against the writes it costs"""
+    if db.get_bind().dialect.name != "postgresql":
+        raise ValueError("Index usage is only available on PostgreSQL")
+
+    plans_using: Dict[str, int] = {}
+    for entry in list(_entries):
+        for name in set(_plan_index_names(entry["plan"])):
+            plans_using[name] = plans_using.get(name, 0) + 1
+
+    tables = {
+        row.relname: row.n_tup_ins + row.n_tup_upd + row.n_tup_del
+        for row in db.execute(
+            text(
+                "SELECT relname, n_tup_ins, n_tup_upd, n_tup_del "
+                "FROM pg_stat_user_tables "
+                "WHERE relname IN "
+                "('restaurants', 'restaurant_hours', 'restaurant_utc_hours')"
+            )
+        )
+    }
+    rows = db.execute(
+        text(
+            "SELECT relname, indexrelname, idx_scan, idx_tup_read, idx_tup_fetch, "
+            "pg_relation_size(indexrelid) AS size_bytes "
+            "FROM pg_stat_user_indexes "
+            "WHERE relname IN "
+            "('restaurants', 'restaurant_hours', 'restaurant_utc_hours') "
+            "ORDER BY relname, indexrelname"
+        )
+    )
+
+    indexes = []
+    for row in rows:
+        writes = tables.get(row.relname, 0)
+        indexes.append(
+            {
+                "table": row.relname,
+                "index": row.indexrelname,
+                "scans": row.idx_scan,
+                "tuples_read": row.idx_tup_read,
+                "tuples_fetched": row.idx_tup_fetch,
+                "size_bytes": row.size_bytes,
+                "table_writes": writes,
+                "scans_per_write": round(row.idx_scan / writes, 3) if writes else None,
+                "slow_query_plans_using": plans_using.get(row.indexrelname, 0),
+                "unused": row.idx_scan == 0,
+            }
+        )
+    return {"tables": tables, "indexes": indexes}
@@ -1,13 +1,15 @@
-import csv
 import logging
 from contextlib import asynccontextmanager
+from brotli_asgi import BrotliMiddleware
 from fastapi import FastAPI
-from sqlalchemy.orm import Session
-from app.db.database import engine, get_db
-from app.db import models
+from app.core.config import settings
+from app.db.database import add_missing_columns, engine, get_db
+from app.db import models, query_log
 from app.api import endpoints
-from app.schemas import restaurant as schemas
-from app.services import restaurant as restaurant_service
+from app.services import csv_sync
+from app.services import schedule_index
+from app.services import utc_schedule
+from app.services import cache_warmer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -17,76 +19,39 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle events for the FastAPI application"""
-    # Startup: Load initial data
+    # Startup: Sync data from the CSV feed
     db = next(get_db())
     try:
-        load_initial_data(db)
+        csv_sync.sync_csv(db)
+        schedule_index.rebuild_index(db, blocking=False)
+        # A full rebuild also picks up any tz database update since the last run
+        utc_schedule.rebuild(db)
     finally:
         db.close()
+    csv_sync.start_watcher()
+    cache_warmer.start()
+    utc_schedule.start_refresher()
     yield
+    # Shutdown: stop background workers
+    utc_schedule.stop_refresher()
+    cache_warmer.stop()
+    csv_sync.stop_watcher()
 
 
 app = FastAPI(title="Liine Restaurant API", lifespan=lifespan)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
-
-def load_initial_data(db: Session):
-    """Load initial data from CSV file"""
-    try:
-        # First, check how many restaurants are already in the database
-        existing_count = db.query(models.Restaurant).count()
-        logger.info(f"Found {existing_count} existing restaurants in database")
-
-        # Read and process restaurants from CSV
-        with open("restaurants.csv", "r") as file:
-            # Count total restaurants
-            total_restaurants = sum(1 for _ in csv.DictReader(file))
-            logger.info(f"Found {total_restaurants} restaurants in CSV")
-
-            # Only proceed if we need to add restaurants
-            if existing_count < total_restaurants:
-                logger.info(
-                    f"Loading {total_restaurants - existing_count} new restaurants from CSV"
-                )
+# Brotli for clients that accept it, gzip otherwise, for responses above the threshold
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_fallback=True,
+)
 
-                # Reset file pointer and skip header
-                file.seek(0)
-                csv_reader = csv.DictReader(file)
-
-                # Keep track of processed restaurants
-                processed = 0
-
-                for row in csv_reader:
-                    restaurant_name = row["Restaurant Name"]
-                    # Check if restaurant already exists
-                    if (
-                        not db.query(models.Restaurant)
-                        .filter_by(name=restaurant_name)
-                        .first()
-                    ):
-                        try:
-                            restaurant = schemas.RestaurantCreate(
-                                name=restaurant_name, hours=row["Hours"]
-                            )
-                            restaurant_service.create_restaurant(db, restaurant)
-                            processed += 1
-                            logger.info(f"Added restaurant: {restaurant_name}")
-                        except Exception as e:
-                            logger.error(
-                                f"Error adding restaurant {restaurant_name}: {str(e)}"
-                            )
-                    else:
-                        logger.debug(f"Restaurant already exists: {restaurant_name}")
-
-                logger.info(f"Successfully processed {processed} new restaurants")
-            else:
-                logger.info("All restaurants already loaded in database")
-
-    except Exception as e:
-        logger.error(f"Error loading initial data: {str(e)}")
-        raise
+# Time every statement and keep the slow ones for /debug/slow-queries
+query_log.install()
 
+# Create database tables
+models.Base.metadata.create_all(bind=engine)
+add_missing_columns(models.Base.metadata)
 
 app.include_router(endpoints.router, prefix="/api/v1")
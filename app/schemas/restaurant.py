@@ -1,7 +1,8 @@
 from uuid import UUID
-from datetime import time
-from typing import List
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime, time
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class RestaurantHoursBase(BaseModel):
@@ -23,6 +24,18 @@ class RestaurantBase(BaseModel):
 
 class RestaurantCreate(RestaurantBase):
     hours: str  # String format for input
+    timezone: Optional[str] = None  # IANA name, e.g. "America/Chicago"
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone '{value}'")
+        return value
 
 
 class RestaurantUpdate(RestaurantCreate):
@@ -31,6 +44,28 @@ class RestaurantUpdate(RestaurantCreate):
 
 class Restaurant(RestaurantBase):
     id: UUID
+    timezone: Optional[str] = None
     hours: List[RestaurantHoursBase]  # List of hours for output
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class WeeklyOccupancy(BaseModel):
+    slot_minutes: int
+    counts: List[int]  # Open restaurants per slot, starting Sunday 00:00
+
+
+class TimelineEvent(BaseModel):
+    slot: int
+    time: datetime
+    opened: List[str]
+    closed: List[str]
+
+
+class Timeline(BaseModel):
+    start: datetime
+    end: datetime
+    slot_minutes: int
+    slot_count: int
+    initial: List[str]  # Restaurants open at the first slot
+    events: List[TimelineEvent]  # Changes to the open set at later slots
@@ -1,44 +1,198 @@
 import json
-from typing import List, Optional
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
 import redis
 import logging
 from app.core.config import settings
+from app.core.time_parser import MINUTES_PER_WEEK
 
 logger = logging.getLogger(__name__)
 
-redis_client = redis.from_url(settings.REDIS_URL)
 CACHE_TTL = 3600  # 1 hour
 
+# Random token replaced on every data change, before any derived data is rebuilt.
+# Background writers read it before computing results and only write if it is
+# unchanged, so a pass that started before a data change (in any worker) can't
+# repopulate the cache with stale data. Schedule indexes are stamped with it too.
+DATA_VERSION_KEY = "restaurants:version"
 
-def get_cached_restaurants(datetime_str: str) -> Optional[List[str]]:
-    """Get restaurants from cache for given datetime"""
+
+class MemoryCache:
+    """In-process stand-in for the subset of the Redis client used here"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (None, value)
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def setex_many_if(
+        self, guard_key: str, expected: Optional[str], ttl: int, items: Dict[str, str]
+    ) -> bool:
+        """Write items only if guard_key still holds expected, atomically"""
+        with self._lock:
+            if self._get(guard_key) != expected:
+                return False
+            expires_at = time.monotonic() + ttl
+            for key, value in items.items():
+                self._data[key] = (expires_at, value)
+            return True
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def pipeline(self, transaction: bool = False) -> "MemoryCache":
+        # Commands apply immediately, so the cache is its own pipeline
+        return self
+
+    def execute(self) -> None:
+        pass
+
+
+if settings.CACHE_BACKEND == "memory":
+    redis_client = MemoryCache()
+else:
+    redis_client = redis.from_url(settings.REDIS_URL)
+
+
+def _cache_key(minute: int) -> str:
+    # Open restaurants depend only on the minute of the week (all hours are
+    # whole minutes), so every datetime in the same bucket shares an entry
+    return f"restaurants:{minute}"
+
+
+def get_cached_restaurants(minute: int) -> Optional[List[str]]:
+    """Get restaurants from cache for given minute-of-week bucket"""
     try:
-        cache_key = f"restaurants:{datetime_str}"
-        cached_data = redis_client.get(cache_key)
+        cached_data = redis_client.get(_cache_key(minute))
         if cached_data:
-            logger.debug(f"Cache hit for {datetime_str}")
+            logger.debug(f"Cache hit for minute {minute}")
             return json.loads(cached_data)
-        logger.debug(f"Cache miss for {datetime_str}")
+        logger.debug(f"Cache miss for minute {minute}")
         return None
     except Exception as e:
         logger.error(f"Error accessing cache: {str(e)}")
         return None
 
 
-def set_cached_restaurants(datetime_str: str, restaurants: List[str]) -> None:
-    """Cache restaurants for given datetime"""
+def set_cached_restaurants(
+    minute: int, restaurants: List[str], version: Optional[str]
+) -> None:
+    """Cache restaurants for given minute-of-week bucket
+
+    Skipped if the data version has moved on since version was read, so a
+    lookup that raced a write can't cache its stale result after invalidation.
+    """
+    if set_cached_restaurants_many({minute: restaurants}, version) is False:
+        logger.debug(f"Data changed, not caching minute {minute}")
+
+
+def _decode(value) -> Optional[str]:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def get_data_version() -> Optional[str]:
+    """Current data version token (None before the first invalidation)"""
     try:
-        cache_key = f"restaurants:{datetime_str}"
-        redis_client.setex(cache_key, CACHE_TTL, json.dumps(restaurants))
-        logger.debug(f"Cached {len(restaurants)} restaurants for {datetime_str}")
+        return _decode(redis_client.get(DATA_VERSION_KEY))
+    except Exception as e:
+        logger.error(f"Error accessing cache: {str(e)}")
+        return None
+
+
+def bump_data_version() -> Optional[str]:
+    """Replace the data version token after a data change; returns the new token"""
+    version = uuid.uuid4().hex
+    try:
+        redis_client.set(DATA_VERSION_KEY, version)
+        return version
+    except Exception as e:
+        logger.error(f"Error bumping data version: {str(e)}")
+        return None
+
+
+def set_cached_restaurants_many(
+    results: Dict[int, List[str]], version: Optional[str]
+) -> Optional[bool]:
+    """Cache several minute-of-week buckets in one round trip
+
+    The write only happens if the data version is still the one the results
+    were computed under. Returns False if it has moved on, None on cache errors.
+    """
+    items = {
+        _cache_key(minute): json.dumps(restaurants)
+        for minute, restaurants in results.items()
+    }
+    try:
+        if isinstance(redis_client, MemoryCache):
+            written = redis_client.setex_many_if(
+                DATA_VERSION_KEY, version, CACHE_TTL, items
+            )
+        else:
+            written = _setex_many_watched(items, version)
+        if written:
+            logger.debug(f"Cached {len(results)} minute buckets")
+        return written
     except Exception as e:
         logger.error(f"Error setting cache: {str(e)}")
+        return None
 
 
-def invalidate_cache() -> None:
-    """Clear all cached data"""
+def _setex_many_watched(items: Dict[str, str], version: Optional[str]) -> bool:
+    # WATCH makes the transaction fail if the version changes before EXEC
+    with redis_client.pipeline() as pipeline:
+        try:
+            pipeline.watch(DATA_VERSION_KEY)
+            if _decode(pipeline.get(DATA_VERSION_KEY)) != version:
+                return False
+            pipeline.multi()
+            for key, value in items.items():
+                pipeline.setex(key, CACHE_TTL, value)
+            pipeline.execute()
+            return True
+        except redis.WatchError:
+            return False
+
+
+def invalidate_minutes(minutes: Iterable[int], batch_size: int = 1000) -> None:
+    """Drop only the given minute-of-week buckets"""
     try:
-        redis_client.flushdb()
-        logger.info("Cache invalidated")
+        keys = [_cache_key(minute) for minute in minutes]
+        for offset in range(0, len(keys), batch_size):
+            redis_client.delete(*keys[offset : offset + batch_size])
+        logger.info(f"Invalidated {len(keys)} cached minute buckets")
     except Exception as e:
         logger.error(f"Error invalidating cache: {str(e)}")
+
+
+def invalidate_cache() -> None:
+    """Clear every minute-of-week bucket
+
+    Deletes the bucket keys rather than flushing the database, so the data
+    version token survives.
+    """
+    invalidate_minutes(range(MINUTES_PER_WEEK))
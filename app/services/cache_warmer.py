@@ -0,0 +1,132 @@
+import threading
+import time
+import logging
+from collections import Counter
+from typing import List, Optional
+from app.core.config import settings
+from app.core.time_parser import MINUTES_PER_WEEK
+from app.db.database import SessionLocal
+from app.services import cache as cache_service
+from app.services import occupancy as occupancy_service
+from app.services import restaurant as restaurant_service
+
+logger = logging.getLogger(__name__)
+
+_requests: Counter = Counter()
+_requests_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def record_request(minute: int) -> None:
+    """Count a request for a minute-of-week bucket to prioritise warming"""
+    with _requests_lock:
+        _requests[minute] += 1
+
+
+def _warm_order() -> List[int]:
+    """Buckets to warm: most requested first, then the rest of the week if enabled
+
+    Request counts are halved after each pass so priority follows recent traffic.
+    """
+    with _requests_lock:
+        hot = [minute for minute, _ in _requests.most_common()]
+        for minute in list(_requests):
+            _requests[minute] //= 2
+            if not _requests[minute]:
+                del _requests[minute]
+
+    if not settings.CACHE_WARM_ALL_BUCKETS:
+        return hot
+    seen = set(hot)
+    return hot + [minute for minute in range(MINUTES_PER_WEEK) if minute not in seen]
+
+
+def warm_cache() -> int:
+    """Precompute open restaurants for the selected buckets; returns buckets written
+
+    Every bucket comes from a single hours query, and the results are written in
+    pipelined batches spaced out to CACHE_WARM_BATCHES_PER_SECOND. A new trigger
+    arriving mid-pass abandons it so the next pass starts from fresh data. Each
+    batch is only written if the shared data version read before the query is
+    unchanged, so a write committed by any worker also stops the pass and
+    queues a fresh one.
+    """
+    _wake.clear()
+    version = cache_service.get_data_version()
+    order = _warm_order()
+    if not order:
+        return 0
+
+    db = SessionLocal()
+    try:
+        names, week_open_sets = occupancy_service.open_sets(
+            restaurant_service.get_hours_rows(db)
+        )
+    finally:
+        db.close()
+
+    batch_size = settings.CACHE_WARM_BATCH_SIZE
+    interval = 1.0 / settings.CACHE_WARM_BATCHES_PER_SECOND
+    written = 0
+    for offset in range(0, len(order), batch_size):
+        if _wake.is_set() or _stop.is_set():
+            logger.info(f"Cache warming interrupted after {written} buckets")
+            return written
+        started = time.monotonic()
+        batch = order[offset : offset + batch_size]
+        written_batch = cache_service.set_cached_restaurants_many(
+            {
+                minute: occupancy_service.names_in(names, week_open_sets[minute])
+                for minute in batch
+            },
+            version,
+        )
+        if written_batch is False:
+            logger.info(f"Data changed after {written} warmed buckets, restarting")
+            _wake.set()
+            return written
+        written += len(batch)
+        _stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    logger.info(f"Warmed {written} cache buckets")
+    return written
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        _wake.wait(timeout=settings.CACHE_WARM_INTERVAL_SECONDS)
+        if _stop.is_set():
+            break
+        try:
+            warm_cache()
+        except Exception as e:
+            logger.error(f"Error warming cache: {str(e)}")
+
+
+def trigger() -> None:
+    """Ask the warmer to start a new pass (no-op if it isn't running)"""
+    _wake.set()
+
+
+def start() -> None:
+    """Start the background warmer and queue an initial pass"""
+    global _thread
+    if not settings.CACHE_WARM_ENABLED or (_thread and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="cache-warmer", daemon=True)
+    _thread.start()
+    trigger()
+
+
+def stop() -> None:
+    """Stop the background warmer"""
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+    _wake.clear()
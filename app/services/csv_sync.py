@@ -0,0 +1,205 @@
+import csv
+import hashlib
+import os
+import threading
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.time_parser import parse_hours_string, week_intervals
+from app.db import models
+from app.db.database import SessionLocal, advisory_lock
+from app.services import cache as cache_service
+from app.services import cache_warmer
+from app.services import restaurant as restaurant_service
+from app.services import schedule_index
+from app.services import utc_schedule
+
+logger = logging.getLogger(__name__)
+
+# Postgres advisory lock key so only one worker syncs at a time
+CSV_SYNC_LOCK_ID = 0x4C49494E45
+
+_watch_thread: Optional[threading.Thread] = None
+_watch_stop = threading.Event()
+
+
+def row_hash(name: str, hours: str) -> str:
+    """Stable hash of one CSV row"""
+    return hashlib.sha256(f"{name}\n{hours}".encode("utf-8")).hexdigest()
+
+
+def read_csv(path: str) -> Dict[str, str]:
+    """Read restaurant name -> hours string from the CSV feed"""
+    with open(path, "r") as file:
+        source = {row["Restaurant Name"]: row["Hours"] for row in csv.DictReader(file)}
+    if not source:
+        # An empty or half-written file would otherwise delete every restaurant
+        raise ValueError(f"No restaurants found in {path}")
+    return source
+
+
+def _minutes(hours: Iterable) -> Set[int]:
+    """Minute-of-week buckets covered by hours entries"""
+    minutes: Set[int] = set()
+    for entry in hours:
+        for start, end in week_intervals(
+            entry.day_of_week, entry.open_time, entry.close_time
+        ):
+            minutes.update(range(start, end))
+    return minutes
+
+
+def sync_csv(db: Session, path: Optional[str] = None) -> dict:
+    """Apply inserts, updates and deletes from the CSV feed to the database
+
+    Each row is hashed and compared with the hash stored when it was last
+    synced, so unchanged rows cost nothing. Restaurants created through the
+    API have no stored hash and are never deleted by a sync. Only cache buckets
+    whose result changed are dropped: those covered by exactly one of the old
+    and new hours of an updated restaurant, or by an inserted or deleted one.
+    """
+    path = path or settings.CSV_PATH
+    source = read_csv(path)
+    batch_size = settings.CSV_SYNC_BATCH_SIZE
+    result = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "failed": []}
+    changed_minutes: Set[int] = set()
+    changed_restaurants = []
+
+    with advisory_lock(db, CSV_SYNC_LOCK_ID):
+        stored = {h.name: h for h in db.query(models.RestaurantSourceHash).all()}
+
+        changes = []
+        for name, hours in source.items():
+            new_hash = row_hash(name, hours)
+            stored_hash = stored.get(name)
+            if stored_hash is not None and stored_hash.row_hash == new_hash:
+                result["unchanged"] += 1
+            else:
+                changes.append((name, hours, new_hash, stored_hash))
+        removed = [h for name, h in stored.items() if name not in source]
+
+        names = [change[0] for change in changes] + [h.name for h in removed]
+        existing = {
+            r.name: r
+            for r in db.query(models.Restaurant)
+            .filter(models.Restaurant.name.in_(names))
+            .all()
+        }
+
+        pending = 0
+        for name, hours, new_hash, stored_hash in changes:
+            try:
+                entries = parse_hours_string(hours)
+            except ValueError as e:
+                logger.error(f"Error syncing restaurant {name}: {str(e)}")
+                result["failed"].append(name)
+                continue
+
+            new_minutes = _minutes(entries)
+            db_restaurant = existing.get(name)
+            if db_restaurant is None:
+                db_restaurant = models.Restaurant(
+                    name=name, timezone=settings.DEFAULT_TIMEZONE
+                )
+                db.add(db_restaurant)
+                db.flush()  # Get the ID without committing
+                changed_minutes |= new_minutes
+                result["inserted"] += 1
+            else:
+                # Buckets open under both the old and new hours keep their result
+                changed_minutes |= _minutes(db_restaurant.hours) ^ new_minutes
+                result["updated"] += 1
+            restaurant_service.set_hours(db, db_restaurant, entries)
+            changed_restaurants.append(db_restaurant)
+
+            if stored_hash is None:
+                db.add(models.RestaurantSourceHash(name=name, row_hash=new_hash))
+            else:
+                stored_hash.row_hash = new_hash
+
+            pending += 1
+            if pending >= batch_size:
+                db.commit()
+                pending = 0
+
+        for stored_hash in removed:
+            db_restaurant = existing.get(stored_hash.name)
+            if db_restaurant is not None:
+                changed_minutes |= _minutes(db_restaurant.hours)
+                db.delete(db_restaurant)
+                result["deleted"] += 1
+            db.delete(stored_hash)
+
+            pending += 1
+            if pending >= batch_size:
+                db.commit()
+                pending = 0
+
+        db.commit()
+
+    logger.info(
+        f"CSV sync: {result['inserted']} inserted, {result['updated']} updated, "
+        f"{result['deleted']} deleted, {result['unchanged']} unchanged, "
+        f"{len(result['failed'])} failed"
+    )
+    if result["inserted"] or result["updated"] or result["deleted"]:
+        cache_service.bump_data_version()
+        cache_service.invalidate_minutes(sorted(changed_minutes))
+        schedule_index.rebuild_index(db)
+        if changed_restaurants:
+            utc_schedule.rebuild(db, changed_restaurants)
+        cache_warmer.trigger()
+    return result
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _watch(path: str) -> None:
+    synced = _file_signature(path)
+    candidate = synced
+    while not _watch_stop.wait(settings.CSV_WATCH_INTERVAL_SECONDS):
+        signature = _file_signature(path)
+        if signature is None or signature == synced:
+            candidate = signature
+            continue
+        if signature != candidate:
+            # Wait for the file to stop changing before syncing it
+            candidate = signature
+            continue
+
+        db = SessionLocal()
+        try:
+            sync_csv(db, path)
+            synced = signature
+        except Exception as e:
+            logger.error(f"Error syncing {path}: {str(e)}")
+        finally:
+            db.close()
+
+
+def start_watcher() -> None:
+    """Poll the CSV feed and sync it whenever it changes"""
+    global _watch_thread
+    if not settings.CSV_WATCH_ENABLED or (_watch_thread and _watch_thread.is_alive()):
+        return
+    _watch_stop.clear()
+    _watch_thread = threading.Thread(
+        target=_watch, args=(settings.CSV_PATH,), name="csv-watcher", daemon=True
+    )
+    _watch_thread.start()
+
+
+def stop_watcher() -> None:
+    """Stop polling the CSV feed"""
+    global _watch_thread
+    _watch_stop.set()
+    if _watch_thread is not None:
+        _watch_thread.join(timeout=5)
+        _watch_thread = None
@@ -0,0 +1,156 @@
+import operator
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from app.core.config import settings
+from app.core.time_parser import (
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    datetime_minute_of_week,
+    week_intervals,
+)
+
+MAX_TIMELINE_SLOTS = 50_000
+
+
+def _merged_intervals(
+    rows: Iterable[Tuple[str, int, time, time]]
+) -> Dict[str, List[Tuple[int, int]]]:
+    """Group hours rows by restaurant into sorted, non-overlapping week intervals"""
+    intervals: Dict[str, List[Tuple[int, int]]] = {}
+    for name, day_of_week, open_time, close_time in rows:
+        intervals.setdefault(name, []).extend(
+            week_intervals(day_of_week, open_time, close_time)
+        )
+
+    merged = {}
+    for name, spans in intervals.items():
+        result: List[List[int]] = []
+        for start, end in sorted(spans):
+            if result and start <= result[-1][1]:
+                result[-1][1] = max(result[-1][1], end)
+            else:
+                result.append([start, end])
+        merged[name] = [(start, end) for start, end in result]
+    return merged
+
+
+def _validate_slot_minutes(slot_minutes: int) -> None:
+    if slot_minutes < 1 or MINUTES_PER_DAY % slot_minutes:
+        raise ValueError("slot_minutes must be a divisor of 1440 (e.g. 1, 15, 60)")
+
+
+def weekly_occupancy(
+    rows: Iterable[Tuple[str, int, time, time]], slot_minutes: int = 15
+) -> List[int]:
+    """Count open restaurants at the start of every slot of the week (Sunday 00:00 first)
+
+    Each interval adds +1 at its start and -1 at its end in a minute-of-week
+    difference array; a cumulative sum then gives the count for every minute.
+    """
+    _validate_slot_minutes(slot_minutes)
+    diff = [0] * (MINUTES_PER_WEEK + 1)
+    for spans in _merged_intervals(rows).values():
+        for start, end in spans:
+            diff[start] += 1
+            diff[end] -= 1
+    counts = list(accumulate(diff[:MINUTES_PER_WEEK]))
+    return counts[::slot_minutes]
+
+
+def open_sets(
+    rows: Iterable[Tuple[str, int, time, time]]
+) -> Tuple[List[str], List[int]]:
+    """Open set for every minute of the week as a bitset over the sorted names
+
+    Same difference-array idea as weekly_occupancy, but each restaurant's bit is
+    toggled at the start and end of its intervals and the cumulative pass uses XOR.
+    """
+    merged = _merged_intervals(rows)
+    names = sorted(merged)
+    toggles = [0] * (MINUTES_PER_WEEK + 1)
+    for idx, name in enumerate(names):
+        bit = 1 << idx
+        for start, end in merged[name]:
+            toggles[start] ^= bit
+            toggles[end] ^= bit
+    return names, list(accumulate(toggles[:MINUTES_PER_WEEK], operator.xor))
+
+
+def names_in(names: List[str], bits: int) -> List[str]:
+    result = []
+    while bits:
+        low_bit = bits & -bits
+        result.append(names[low_bit.bit_length() - 1])
+        bits ^= low_bit
+    return result
+
+
+def timeline(
+    rows: Iterable[Tuple[str, int, time, time]],
+    start: datetime,
+    end: datetime,
+    slot_minutes: int = 15,
+    timezones: Optional[Dict[str, str]] = None,
+) -> dict:
+    """Open set at every slot in [start, end), delta-encoded as opened/closed events
+
+    Returns the restaurants open at the first slot, then one event for each
+    later slot where the open set changed. Aware datetimes are converted into
+    each restaurant's timezone (from timezones, else DEFAULT_TIMEZONE); naive
+    ones are compared with local hours as given.
+    """
+    _validate_slot_minutes(slot_minutes)
+    if end <= start:
+        raise ValueError("end must be after start")
+    step = timedelta(minutes=slot_minutes)
+    slot_count = -(-(end - start) // step)
+    if slot_count > MAX_TIMELINE_SLOTS:
+        raise ValueError(
+            f"Range covers {slot_count} slots; the maximum is {MAX_TIMELINE_SLOTS}"
+        )
+
+    names, week_open_sets = open_sets(rows)
+
+    # Bitmask of the restaurants in each zone, so each slot is converted once per zone
+    zone_masks: Dict[str, int] = {}
+    for idx, name in enumerate(names):
+        zone = (timezones or {}).get(name) or settings.DEFAULT_TIMEZONE
+        zone_masks[zone] = zone_masks.get(zone, 0) | (1 << idx)
+    zones = [(ZoneInfo(zone), mask) for zone, mask in zone_masks.items()]
+
+    def open_at(dt: datetime) -> int:
+        if dt.tzinfo is None:
+            return week_open_sets[datetime_minute_of_week(dt)]
+        bits = 0
+        for zone, mask in zones:
+            local = dt.astimezone(zone)
+            bits |= week_open_sets[datetime_minute_of_week(local)] & mask
+        return bits
+
+    previous = open_at(start)
+    events = []
+    for slot in range(1, slot_count):
+        slot_time = start + slot * step
+        current = open_at(slot_time)
+        changed = previous ^ current
+        if changed:
+            events.append(
+                {
+                    "slot": slot,
+                    "time": slot_time,
+                    "opened": names_in(names, changed & current),
+                    "closed": names_in(names, changed & previous),
+                }
+            )
+        previous = current
+
+    return {
+        "start": start,
+        "end": end,
+        "slot_minutes": slot_minutes,
+        "slot_count": slot_count,
+        "initial": names_in(names, open_at(start)),
+        "events": events,
+    }
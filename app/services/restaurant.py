@@ -1,11 +1,12 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, time
 from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 import logging
+from app.core.config import settings
 from app.db import models
 from app.schemas import restaurant as schemas
-from app.core.time_parser import parse_hours_string
+from app.core.time_parser import HoursEntry, parse_hours_string
 
 logger = logging.getLogger(__name__)
 
@@ -16,79 +17,109 @@ def get_restaurants(
     return db.query(models.Restaurant).offset(skip).limit(limit).all()
 
 
-def get_open_restaurants(db: Session, datetime_str: str) -> List[str]:
-    """Get all restaurants open at the specified datetime"""
+def parse_query_datetime(datetime_str: str) -> datetime:
+    """Parse an ISO 8601 datetime string from a query parameter"""
     try:
-        # Parse the datetime string
-        dt = datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
-        current_time = dt.time()
-        day_of_week = dt.weekday()
-
-        # Convert Python's weekday (0=Monday) to our format (0=Sunday)
-        day_of_week = (day_of_week + 1) % 7
-        previous_day = (day_of_week - 1) % 7
-
-        logger.debug(
-            f"Checking restaurants open on day {day_of_week} at time {current_time}"
+        return datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
+    except ValueError as e:
+        logger.error(f"Error parsing datetime '{datetime_str}': {str(e)}")
+        raise ValueError(
+            f"Invalid datetime format. Please use ISO format (e.g., '2024-03-15T19:30:00')"
         )
 
-        # Build the query with proper time conditions
-        query = (
-            db.query(models.Restaurant.name)
-            .join(models.RestaurantHours)
-            .filter(
-                or_(
-                    # Case 1: Current day's normal hours
-                    and_(
-                        models.RestaurantHours.day_of_week == day_of_week,
-                        models.RestaurantHours.open_time <= current_time,
-                        models.RestaurantHours.close_time > current_time,
-                        models.RestaurantHours.close_time
-                        > models.RestaurantHours.open_time,
-                    ),
-                    # Case 2: Current day's overnight hours (open today, closes after midnight)
-                    and_(
-                        models.RestaurantHours.day_of_week == day_of_week,
-                        models.RestaurantHours.open_time <= current_time,
-                        models.RestaurantHours.close_time
-                        < models.RestaurantHours.open_time,
-                    ),
-                    # Case 3: Previous day's overnight hours (opened yesterday, closes today)
-                    and_(
-                        models.RestaurantHours.day_of_week == previous_day,
-                        models.RestaurantHours.close_time
-                        < models.RestaurantHours.open_time,
-                        current_time < models.RestaurantHours.close_time,
-                    ),
-                )
+
+def get_open_restaurants(db: Session, datetime_str: str) -> List[str]:
+    """Get all restaurants open at the specified datetime
+
+    Hours are compared with the wall-clock time of the datetime as given, so
+    this is for naive datetimes; see utc_schedule for timezone-aware ones.
+    """
+    # Parse the datetime string
+    dt = parse_query_datetime(datetime_str)
+    current_time = dt.time()
+    day_of_week = dt.weekday()
+
+    # Convert Python's weekday (0=Monday) to our format (0=Sunday)
+    day_of_week = (day_of_week + 1) % 7
+    previous_day = (day_of_week - 1) % 7
+
+    logger.debug(
+        f"Checking restaurants open on day {day_of_week} at time {current_time}"
+    )
+
+    # Build the query with proper time conditions
+    query = (
+        db.query(models.Restaurant.name)
+        .join(models.RestaurantHours)
+        .filter(
+            or_(
+                # Case 1: Current day's normal hours
+                and_(
+                    models.RestaurantHours.day_of_week == day_of_week,
+                    models.RestaurantHours.open_time <= current_time,
+                    models.RestaurantHours.close_time > current_time,
+                    models.RestaurantHours.close_time
+                    > models.RestaurantHours.open_time,
+                ),
+                # Case 2: Current day's overnight hours (open today, closes after midnight)
+                and_(
+                    models.RestaurantHours.day_of_week == day_of_week,
+                    models.RestaurantHours.open_time <= current_time,
+                    models.RestaurantHours.close_time
+                    < models.RestaurantHours.open_time,
+                ),
+                # Case 3: Previous day's overnight hours (opened yesterday, closes today)
+                and_(
+                    models.RestaurantHours.day_of_week == previous_day,
+                    models.RestaurantHours.close_time
+                    < models.RestaurantHours.open_time,
+                    current_time < models.RestaurantHours.close_time,
+                ),
             )
-            .distinct()
-            .order_by(models.Restaurant.name)
         )
-
-        results = [restaurant.name for restaurant in query.all()]
-        logger.debug(
-            f"Found {len(results)} open restaurants at {current_time} on day {day_of_week}"
+        .distinct()
+    )
+
+    # Sorted in Python rather than by the database collation, so the order
+    # matches the schedule index and the cache warmer
+    results = sorted(restaurant.name for restaurant in query.all())
+    logger.debug(
+        f"Found {len(results)} open restaurants at {current_time} on day {day_of_week}"
+    )
+    return results
+
+
+def get_hours_rows(db: Session) -> List[Tuple[str, int, time, time]]:
+    """Get (name, day_of_week, open_time, close_time) for every hours entry"""
+    return (
+        db.query(
+            models.Restaurant.name,
+            models.RestaurantHours.day_of_week,
+            models.RestaurantHours.open_time,
+            models.RestaurantHours.close_time,
         )
-        return results
+        .join(models.RestaurantHours)
+        .all()
+    )
 
-    except ValueError as e:
-        logger.error(f"Error parsing datetime '{datetime_str}': {str(e)}")
-        raise ValueError(
-            f"Invalid datetime format. Please use ISO format (e.g., '2024-03-15T19:30:00')"
+
+def get_timezones(db: Session) -> Dict[str, str]:
+    """Get name -> timezone for every restaurant"""
+    return {
+        name: timezone or settings.DEFAULT_TIMEZONE
+        for name, timezone in db.query(
+            models.Restaurant.name, models.Restaurant.timezone
         )
+    }
 
 
-def create_restaurant(
-    db: Session, restaurant: schemas.RestaurantCreate
-) -> models.Restaurant:
-    """Create a restaurant with its hours"""
-    db_restaurant = models.Restaurant(name=restaurant.name)
-    db.add(db_restaurant)
-    db.flush()  # Get the ID without committing
+def set_hours(
+    db: Session, db_restaurant: models.Restaurant, hours_entries: List[HoursEntry]
+) -> None:
+    """Replace a restaurant's hours with the given entries (without committing)"""
+    for hour in db_restaurant.hours:
+        db.delete(hour)
 
-    # Parse hours and create RestaurantHours entries
-    hours_entries = parse_hours_string(restaurant.hours)
     for entry in hours_entries:
         db_hours = models.RestaurantHours(
             restaurant_id=db_restaurant.id,
@@ -98,6 +129,20 @@ def create_restaurant(
         )
         db.add(db_hours)
 
+
+def create_restaurant(
+    db: Session, restaurant: schemas.RestaurantCreate
+) -> models.Restaurant:
+    """Create a restaurant with its hours"""
+    db_restaurant = models.Restaurant(
+        name=restaurant.name, timezone=restaurant.timezone or settings.DEFAULT_TIMEZONE
+    )
+    db.add(db_restaurant)
+    db.flush()  # Get the ID without committing
+
+    # Parse hours and create RestaurantHours entries
+    set_hours(db, db_restaurant, parse_hours_string(restaurant.hours))
+
     db.commit()
     db.refresh(db_restaurant)
     return db_restaurant
@@ -113,23 +158,13 @@ def update_restaurant(
     """Update a restaurant and its hours"""
     db_restaurant = get_restaurant_by_name(db, name)
     if db_restaurant:
-        # Update name
+        # Update name, and the timezone if one is given
         db_restaurant.name = restaurant.name
+        if restaurant.timezone:
+            db_restaurant.timezone = restaurant.timezone
 
-        # Delete existing hours
-        for hour in db_restaurant.hours:
-            db.delete(hour)
-
-        # Add new hours
-        hours_entries = parse_hours_string(restaurant.hours)
-        for entry in hours_entries:
-            db_hours = models.RestaurantHours(
-                restaurant_id=db_restaurant.id,
-                day_of_week=entry.day_of_week,
-                open_time=entry.open_time,
-                close_time=entry.close_time,
-            )
-            db.add(db_hours)
+        # Replace existing hours
+        set_hours(db, db_restaurant, parse_hours_string(restaurant.hours))
 
         db.commit()
         db.refresh(db_restaurant)
@@ -0,0 +1,383 @@
+import fcntl
+import glob
+import mmap
+import os
+import struct
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime, time
+from time import monotonic
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.time_parser import (
+    MINUTES_PER_WEEK,
+    datetime_minute_of_week,
+    week_intervals,
+)
+from app.db.database import SessionLocal
+from app.services import cache as cache_service
+from app.services import restaurant as restaurant_service
+
+logger = logging.getLogger(__name__)
+
+# Control file: magic + current generation. Readers map it once and compare the
+# generation on every lookup; the builder bumps it after the data file is in place.
+CONTROL_MAGIC = b"LIINEGEN"
+CONTROL_HEADER = struct.Struct("<8sQ")
+
+# Data file: header, name offsets, UTF-8 names, then one bitmap row per
+# minute of the week with bit i set when restaurant i (sorted by name) is open.
+# The header carries the cache data version token the hours were read under;
+# a generation is only trusted while that token is still current, since writes
+# in other pods (or hosts) bump the token but only rebuild their own index.
+INDEX_MAGIC = b"LIINEIDX"
+INDEX_HEADER = struct.Struct("<8sQIIQQ32s")
+
+# Minimum gap between background rebuilds started by a stale or missing index
+REBUILD_RETRY_SECONDS = 5.0
+
+HoursRow = Tuple[str, int, time, time]
+
+
+class MappedIndex(NamedTuple):
+    path: str
+    generation: int
+    version: Optional[str]
+    buffer: mmap.mmap
+    restaurant_count: int
+    row_bytes: int
+    names_offset: int
+    bitmap_offset: int
+
+    def names_at(self, minute: int) -> List[str]:
+        start = self.bitmap_offset + minute * self.row_bytes
+        row = int.from_bytes(self.buffer[start : start + self.row_bytes], "little")
+        names = []
+        while row:
+            low_bit = row & -row
+            names.append(self.name(low_bit.bit_length() - 1))
+            row ^= low_bit
+        return names
+
+    def name(self, idx: int) -> str:
+        start, end = struct.unpack_from(
+            "<II", self.buffer, INDEX_HEADER.size + idx * 4
+        )
+        base = self.names_offset
+        return self.buffer[base + start : base + end].decode("utf-8")
+
+
+_lock = threading.Lock()
+_control: Optional[Tuple[str, mmap.mmap]] = None
+_current: Optional[MappedIndex] = None
+_rebuild_thread: Optional[threading.Thread] = None
+_rebuild_started_at: Optional[float] = None
+
+
+def _control_path(path: str) -> str:
+    return f"{path}.gen"
+
+
+def _data_path(path: str, generation: int) -> str:
+    return f"{path}.{generation}"
+
+
+def _read_generation(buffer) -> int:
+    magic, generation = CONTROL_HEADER.unpack_from(buffer)
+    if magic != CONTROL_MAGIC:
+        raise ValueError("Schedule index control file is corrupt")
+    return generation
+
+
+def encode_index(
+    rows: Iterable[HoursRow], generation: int, version: Optional[str] = None
+) -> bytes:
+    """Encode hours rows (name, day_of_week, open_time, close_time) as an index file"""
+    rows = list(rows)
+    names = sorted({row[0] for row in rows})
+    positions = {name: idx for idx, name in enumerate(names)}
+    row_bytes = max(1, (len(names) + 7) // 8)
+
+    minutes = [0] * MINUTES_PER_WEEK
+    for name, day_of_week, open_time, close_time in rows:
+        bit = 1 << positions[name]
+        for start, end in week_intervals(day_of_week, open_time, close_time):
+            for minute in range(start, end):
+                minutes[minute] |= bit
+
+    encoded_names = [name.encode("utf-8") for name in names]
+    offsets = [0]
+    for encoded in encoded_names:
+        offsets.append(offsets[-1] + len(encoded))
+
+    names_offset = INDEX_HEADER.size + 4 * len(offsets)
+    bitmap_offset = names_offset + offsets[-1]
+    bitmap_offset += -bitmap_offset % 8
+
+    buffer = bytearray(bitmap_offset + MINUTES_PER_WEEK * row_bytes)
+    INDEX_HEADER.pack_into(
+        buffer,
+        0,
+        INDEX_MAGIC,
+        generation,
+        len(names),
+        row_bytes,
+        names_offset,
+        bitmap_offset,
+        (version or "").encode("ascii"),
+    )
+    struct.pack_into(f"<{len(offsets)}I", buffer, INDEX_HEADER.size, *offsets)
+    buffer[names_offset : names_offset + offsets[-1]] = b"".join(encoded_names)
+    for minute, row in enumerate(minutes):
+        if row:
+            start = bitmap_offset + minute * row_bytes
+            buffer[start : start + row_bytes] = row.to_bytes(row_bytes, "little")
+    return bytes(buffer)
+
+
+@contextmanager
+def _builder_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """Hold the cross-process builder lock; yields False if it is busy and not blocking"""
+    with open(f"{path}.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+
+def _next_generation(path: str) -> int:
+    control_path = _control_path(path)
+    if not os.path.exists(control_path):
+        return 1
+    with open(control_path, "rb") as control_file:
+        return _read_generation(control_file.read(CONTROL_HEADER.size)) + 1
+
+
+def _write_control(path: str, generation: int) -> None:
+    control_path = _control_path(path)
+    control = CONTROL_HEADER.pack(CONTROL_MAGIC, generation)
+    if os.path.exists(control_path):
+        # Overwrite in place so workers that already mapped the file see it
+        fd = os.open(control_path, os.O_WRONLY)
+        try:
+            os.pwrite(fd, control, 0)
+        finally:
+            os.close(fd)
+    else:
+        with open(f"{control_path}.tmp", "wb") as control_file:
+            control_file.write(control)
+        os.replace(f"{control_path}.tmp", control_path)
+
+
+def _publish(path: str, rows: Iterable[HoursRow], version: Optional[str]) -> int:
+    """Write the next generation and bump the control file (builder lock held)
+
+    The data file is written under a temporary name and renamed into place before
+    the control generation is bumped, so readers never observe a partial index.
+    """
+    generation = _next_generation(path)
+    data_path = _data_path(path, generation)
+    with open(f"{data_path}.tmp", "wb") as data_file:
+        data_file.write(encode_index(rows, generation, version))
+    os.replace(f"{data_path}.tmp", data_path)
+    _write_control(path, generation)
+
+    # Keep the previous generation for readers that are about to switch over
+    for stale_path in glob.glob(f"{glob.escape(path)}.[0-9]*"):
+        suffix = stale_path.rsplit(".", 1)[-1]
+        if suffix.isdigit() and int(suffix) < generation - 1:
+            os.remove(stale_path)
+
+    logger.info(f"Published schedule index generation {generation}")
+    return generation
+
+
+def _retire(path: str) -> None:
+    """Bump the control file to a generation with no data file (builder lock held)
+
+    Readers find no index for it and fall back to the database until the next
+    successful build, instead of serving the previous generation indefinitely.
+    """
+    generation = _next_generation(path)
+    data_path = _data_path(path, generation)
+    for partial_path in (data_path, f"{data_path}.tmp"):
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    _write_control(path, generation)
+    logger.warning(f"Schedule index disabled at generation {generation}")
+
+
+def write_index(
+    rows: Iterable[HoursRow], version: Optional[str] = None
+) -> Optional[int]:
+    """Publish a new index generation built from the given hours rows"""
+    path = settings.SCHEDULE_INDEX_PATH
+    if not path:
+        return None
+    with _builder_lock(path):
+        return _publish(path, rows, version)
+
+
+def rebuild_index(db: Session, blocking: bool = True) -> Optional[int]:
+    """Rebuild the shared schedule index from the database
+
+    Only one process builds at a time, and it reads the hours while holding the
+    builder lock so a slower build can never publish over a newer one. With
+    blocking=False (used at startup) a worker skips the build if another worker
+    is already doing it. The data version token is read before the hours, so a
+    change committed during the build leaves the new generation already stale.
+    A failed build disables the index rather than leaving the old one in place.
+    """
+    path = settings.SCHEDULE_INDEX_PATH
+    if not path:
+        return None
+    try:
+        with _builder_lock(path, blocking) as acquired:
+            if not acquired:
+                logger.info("Schedule index is being built by another worker")
+                return None
+            try:
+                version = cache_service.get_data_version()
+                return _publish(path, restaurant_service.get_hours_rows(db), version)
+            except Exception:
+                _retire(path)
+                raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding schedule index: {str(e)}")
+        return None
+
+
+def _open_control(path: str) -> Optional[mmap.mmap]:
+    global _control
+    if _control is not None and _control[0] == path:
+        return _control[1]
+    try:
+        with open(_control_path(path), "rb") as control_file:
+            buffer = mmap.mmap(
+                control_file.fileno(), CONTROL_HEADER.size, access=mmap.ACCESS_READ
+            )
+    except (FileNotFoundError, ValueError):
+        return None
+    _control = (path, buffer)
+    return buffer
+
+
+def _map_generation(path: str, generation: int) -> Optional[MappedIndex]:
+    try:
+        with open(_data_path(path, generation), "rb") as data_file:
+            buffer = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+    try:
+        magic, file_generation, count, row_bytes, names_offset, bitmap_offset, version = (
+            INDEX_HEADER.unpack_from(buffer)
+        )
+    except struct.error:
+        magic = None
+    if magic != INDEX_MAGIC or file_generation != generation:
+        buffer.close()
+        raise ValueError(f"Schedule index generation {generation} is corrupt")
+    version = version.rstrip(b"\0").decode("ascii") or None
+    return MappedIndex(
+        path, generation, version, buffer, count, row_bytes, names_offset, bitmap_offset
+    )
+
+
+def current_index() -> Optional[MappedIndex]:
+    """Return the mapping for the latest published generation, if any"""
+    global _current
+    path = settings.SCHEDULE_INDEX_PATH
+    if not path:
+        return None
+
+    current = _current
+    control = _control[1] if _control is not None and _control[0] == path else None
+    if (
+        current is not None
+        and control is not None
+        and current.path == path
+        and current.generation == _read_generation(control)
+    ):
+        return current
+
+    with _lock:
+        control = _open_control(path)
+        if control is None:
+            return None
+        generation = _read_generation(control)
+        if _current is None or _current.path != path or _current.generation != generation:
+            mapped = _map_generation(path, generation)
+            if mapped is None:
+                return None
+            # The old mapping is unmapped once in-flight lookups drop it
+            _current = mapped
+            logger.info(f"Switched to schedule index generation {generation}")
+        return _current
+
+
+def _rebuild() -> None:
+    db = SessionLocal()
+    try:
+        rebuild_index(db, blocking=False)
+    finally:
+        db.close()
+
+
+def rebuild_in_background() -> None:
+    """Start a rebuild in this process unless one ran in the last few seconds"""
+    global _rebuild_thread, _rebuild_started_at
+    with _lock:
+        now = monotonic()
+        if _rebuild_thread is not None and _rebuild_thread.is_alive():
+            return
+        if (
+            _rebuild_started_at is not None
+            and now - _rebuild_started_at < REBUILD_RETRY_SECONDS
+        ):
+            return
+        _rebuild_started_at = now
+        _rebuild_thread = threading.Thread(
+            target=_rebuild, name="schedule-index-rebuild", daemon=True
+        )
+        _rebuild_thread.start()
+
+
+def get_open_restaurants(dt: datetime, version: Optional[str]) -> Optional[List[str]]:
+    """Look up restaurants open at dt, or None if no current index is available
+
+    version is the data version token read before the lookup. A generation
+    stamped with another token predates a change made elsewhere, so it is
+    ignored and this process rebuilds its index in the background.
+    """
+    if not settings.SCHEDULE_INDEX_PATH:
+        return None
+    try:
+        index = current_index()
+    except Exception as e:
+        logger.error(f"Error reading schedule index: {str(e)}")
+        index = None
+    if index is None or index.version != version:
+        rebuild_in_background()
+        return None
+    return index.names_at(datetime_minute_of_week(dt))
+
+
+def index_status() -> dict:
+    """Describe the schedule index mapped by this worker"""
+    index = current_index()
+    return {
+        "enabled": bool(settings.SCHEDULE_INDEX_PATH),
+        "path": settings.SCHEDULE_INDEX_PATH or None,
+        "generation": index.generation if index else None,
+        "version": index.version if index else None,
+        "current": index.version == cache_service.get_data_version() if index else None,
+        "restaurant_count": index.restaurant_count if index else None,
+        "size_bytes": len(index.buffer) if index else None,
+        "pid": os.getpid(),
+    }
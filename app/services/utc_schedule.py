@@ -0,0 +1,271 @@
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from app.core.config import settings
+from app.core.time_parser import (
+    MINUTES_PER_WEEK,
+    datetime_minute_of_week,
+    week_intervals,
+)
+from app.db import models
+from app.db.database import SessionLocal, advisory_lock
+
+logger = logging.getLogger(__name__)
+
+# Postgres advisory lock key so full and per-restaurant rebuilds never interleave
+UTC_SCHEDULE_LOCK_ID = 0x4C49494E46
+
+# Offset transitions are found by probing at this step, then bisecting to the minute
+TRANSITION_PROBE_STEP = timedelta(hours=1)
+
+Segment = Tuple[datetime, datetime, int]
+
+_refresh_thread: Optional[threading.Thread] = None
+_refresh_stop = threading.Event()
+
+
+def _now() -> datetime:
+    """Current time as a naive UTC datetime, truncated to the minute"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+
+
+def restaurant_timezone(restaurant: models.Restaurant) -> ZoneInfo:
+    return ZoneInfo(restaurant.timezone or settings.DEFAULT_TIMEZONE)
+
+
+def _utc_offset(tz: ZoneInfo, at: datetime) -> int:
+    """UTC offset of tz in minutes at the naive UTC datetime at"""
+    offset = at.replace(tzinfo=timezone.utc).astimezone(tz).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+@lru_cache(maxsize=64)
+def offset_segments(
+    tz_name: str, start: datetime, end: datetime
+) -> Tuple[Segment, ...]:
+    """Split [start, end) into (valid_from, valid_until, offset) constant-offset spans
+
+    start and end are naive UTC; each span ends at a DST (or other offset)
+    transition of the zone, found to the minute.
+    """
+    tz = ZoneInfo(tz_name)
+    segments = []
+    segment_start = start
+    current = _utc_offset(tz, start)
+    probe = start
+    while probe < end:
+        next_probe = min(probe + TRANSITION_PROBE_STEP, end)
+        if _utc_offset(tz, next_probe) != current:
+            low, high = probe, next_probe
+            while high - low > timedelta(minutes=1):
+                middle = low + timedelta(minutes=(high - low) // timedelta(minutes=2))
+                if _utc_offset(tz, middle) == current:
+                    low = middle
+                else:
+                    high = middle
+            segments.append((segment_start, high, current))
+            segment_start = high
+            current = _utc_offset(tz, high)
+        probe = next_probe
+    segments.append((segment_start, end, current))
+    # A transition exactly at end leaves an empty final span
+    return tuple(segment for segment in segments if segment[0] < segment[1])
+
+
+def utc_intervals(hours: Iterable, offset: int) -> List[Tuple[int, int]]:
+    """Local hours entries as [start, end) UTC minute-of-week intervals for an offset"""
+    intervals = []
+    for entry in hours:
+        for start, end in week_intervals(
+            entry.day_of_week, entry.open_time, entry.close_time
+        ):
+            start, end = start - offset, end - offset
+            shift = start // MINUTES_PER_WEEK * MINUTES_PER_WEEK
+            start, end = start - shift, end - shift
+            if end <= MINUTES_PER_WEEK:
+                intervals.append((start, end))
+            else:
+                intervals.append((start, MINUTES_PER_WEEK))
+                intervals.append((0, end - MINUTES_PER_WEEK))
+    return intervals
+
+
+def _new_horizon() -> Tuple[datetime, datetime]:
+    now = _now()
+    return (
+        now - timedelta(days=settings.UTC_SCHEDULE_PAST_DAYS),
+        now + timedelta(days=settings.UTC_SCHEDULE_FUTURE_DAYS),
+    )
+
+
+def horizon_bounds(db: Session) -> Optional[Tuple[datetime, datetime]]:
+    """The [start, end) span covered by the precomputed schedule, if any"""
+    start, end = db.query(
+        func.min(models.RestaurantUtcHours.valid_from),
+        func.max(models.RestaurantUtcHours.valid_until),
+    ).one()
+    if start is None:
+        return None
+    return start, end
+
+
+def _add_rows(
+    db: Session, restaurant: models.Restaurant, horizon: Tuple[datetime, datetime]
+) -> None:
+    tz_name = restaurant.timezone or settings.DEFAULT_TIMEZONE
+    for valid_from, valid_until, offset in offset_segments(tz_name, *horizon):
+        for start, end in utc_intervals(restaurant.hours, offset):
+            db.add(
+                models.RestaurantUtcHours(
+                    restaurant_id=restaurant.id,
+                    start_minute=start,
+                    end_minute=end,
+                    valid_from=valid_from,
+                    valid_until=valid_until,
+                )
+            )
+
+
+def rebuild(
+    db: Session, restaurants: Optional[Sequence[models.Restaurant]] = None
+) -> None:
+    """Regenerate the UTC schedule
+
+    With no restaurants the whole table is replaced over a fresh horizon around
+    now. Otherwise only the given restaurants are regenerated, over the horizon
+    the table already covers.
+    """
+    try:
+        with advisory_lock(db, UTC_SCHEDULE_LOCK_ID):
+            if restaurants is None:
+                horizon = _new_horizon()
+                db.query(models.RestaurantUtcHours).delete()
+                restaurants = (
+                    db.query(models.Restaurant)
+                    .options(selectinload(models.Restaurant.hours))
+                    .all()
+                )
+            else:
+                horizon = horizon_bounds(db) or _new_horizon()
+                db.query(models.RestaurantUtcHours).filter(
+                    models.RestaurantUtcHours.restaurant_id.in_(
+                        [r.id for r in restaurants]
+                    )
+                ).delete()
+            for restaurant in restaurants:
+                _add_rows(db, restaurant, horizon)
+            db.commit()
+        logger.info(
+            f"Rebuilt UTC schedule for {len(restaurants)} restaurants "
+            f"from {horizon[0]} to {horizon[1]}"
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding UTC schedule: {str(e)}")
+
+
+def refresh(db: Session) -> bool:
+    """Rebuild the whole schedule once less than half the future window remains"""
+    bounds = horizon_bounds(db)
+    now = _now()
+    remaining = timedelta(days=settings.UTC_SCHEDULE_FUTURE_DAYS / 2)
+    if bounds is not None and bounds[0] <= now and bounds[1] - now > remaining:
+        return False
+    rebuild(db)
+    return True
+
+
+def _open_by_conversion(db: Session, dt: datetime) -> List[str]:
+    """Convert dt into every restaurant's timezone and check its local hours"""
+    names = []
+    restaurants = (
+        db.query(models.Restaurant).options(selectinload(models.Restaurant.hours)).all()
+    )
+    for restaurant in restaurants:
+        local = dt.astimezone(restaurant_timezone(restaurant))
+        minute = datetime_minute_of_week(local)
+        for entry in restaurant.hours:
+            spans = week_intervals(entry.day_of_week, entry.open_time, entry.close_time)
+            if any(start <= minute < end for start, end in spans):
+                names.append(restaurant.name)
+                break
+    return sorted(names)
+
+
+def get_open_restaurants(db: Session, dt: datetime) -> List[str]:
+    """Restaurants open at the timezone-aware datetime dt, each in its own timezone
+
+    One range query on the precomputed schedule. An empty result is only
+    trusted when dt falls inside the precomputed horizon; otherwise every
+    restaurant is checked by converting dt into its timezone.
+    """
+    at = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    minute = datetime_minute_of_week(at)
+    query = (
+        db.query(models.Restaurant.name)
+        .join(models.RestaurantUtcHours)
+        .filter(
+            models.RestaurantUtcHours.start_minute <= minute,
+            models.RestaurantUtcHours.end_minute > minute,
+            models.RestaurantUtcHours.valid_from <= at,
+            models.RestaurantUtcHours.valid_until > at,
+        )
+        .distinct()
+    )
+    # Python order, like every other lookup path
+    results = sorted(restaurant.name for restaurant in query.all())
+    if results:
+        return results
+
+    bounds = horizon_bounds(db)
+    if bounds is None or not bounds[0] <= at < bounds[1]:
+        logger.info(f"{dt.isoformat()} is outside the UTC schedule, converting instead")
+        return _open_by_conversion(db, dt)
+    return results
+
+
+def schedule_status(db: Session) -> dict:
+    """Describe the precomputed UTC schedule"""
+    bounds = horizon_bounds(db)
+    return {
+        "valid_from": bounds[0] if bounds else None,
+        "valid_until": bounds[1] if bounds else None,
+        "rows": db.query(models.RestaurantUtcHours).count(),
+    }
+
+
+def _refresh_loop() -> None:
+    while not _refresh_stop.wait(settings.UTC_SCHEDULE_REFRESH_SECONDS):
+        db = SessionLocal()
+        try:
+            refresh(db)
+        except Exception as e:
+            logger.error(f"Error refreshing UTC schedule: {str(e)}")
+        finally:
+            db.close()
+
+
+def start_refresher() -> None:
+    """Periodically extend the UTC schedule before its horizon runs out"""
+    global _refresh_thread
+    if _refresh_thread and _refresh_thread.is_alive():
+        return
+    _refresh_stop.clear()
+    _refresh_thread = threading.Thread(
+        target=_refresh_loop, name="utc-schedule-refresher", daemon=True
+    )
+    _refresh_thread.start()
+
+
+def stop_refresher() -> None:
+    """Stop the UTC schedule refresher"""
+    global _refresh_thread
+    _refresh_stop.set()
+    if _refresh_thread is not None:
+        _refresh_thread.join(timeout=5)
+        _refresh_thread = None
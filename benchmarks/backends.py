@@ -0,0 +1,105 @@
+"""Request throughput of each storage backend
+
+Each backend runs in its own process (the engine is chosen at import time),
+loads restaurants.csv and times uncached open-restaurant lookups, list
+requests and create/delete round trips through the API. The postgres run
+syncs the CSV into the database configured by the POSTGRES_* settings.
+
+Usage: python -m benchmarks.backends [--backends memory sqlite postgres] [--requests N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+
+def requests_per_second(func: Callable[[int], None], count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return count / (time.perf_counter() - start)
+
+
+def run_worker(count: int) -> dict:
+    from fastapi.testclient import TestClient
+    from app.db.database import SessionLocal
+    from app.main import app
+    from app.services import csv_sync
+
+    db = SessionLocal()
+    try:
+        csv_sync.sync_csv(db)
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    datetimes = [
+        f"2024-03-{15 + i % 7}T{i % 24:02d}:{i % 60:02d}:00" for i in range(count)
+    ]
+
+    def open_lookup(i: int) -> None:
+        client.get(f"/api/v1/restaurants/open?datetime={datetimes[i]}&use_cache=false")
+
+    def list_all(i: int) -> None:
+        client.get("/api/v1/restaurants/")
+
+    def create_delete(i: int) -> None:
+        client.post(
+            "/api/v1/restaurants/",
+            json={"name": f"Benchmark {i}", "hours": "Mon-Fri 9:00 am - 5:00 pm"},
+        )
+        client.delete(f"/api/v1/restaurants/Benchmark {i}")
+
+    return {
+        "open": requests_per_second(open_lookup, count),
+        "list": requests_per_second(list_all, max(1, count // 10)),
+        "write": requests_per_second(create_delete, max(1, count // 10)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends", nargs="+", default=["memory", "sqlite", "postgres"]
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.requests)))
+        return
+
+    print(f"{'backend':<10}{'open req/s':>12}{'list req/s':>12}{'write req/s':>13}")
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DATABASE_BACKEND=backend,
+                SQLITE_PATH=os.path.join(tmp, "restaurants.db"),
+            )
+            if backend != "postgres":
+                env["CACHE_BACKEND"] = "memory"
+            command = [sys.executable, "-m", "benchmarks.backends", "--worker"]
+            result = subprocess.run(
+                command + ["--requests", str(args.requests)],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        if result.returncode != 0:
+            print(f"{backend:<10}{'unavailable':>12}")
+            continue
+        rates = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{backend:<10}{rates['open']:>12.0f}"
+            f"{rates['list']:>12.0f}{rates['write']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Bytes on the wire and encode CPU per response for the restaurant list
+
+Builds the GET /restaurants/ payload from restaurants.csv (no database needed)
+and compares JSON with MessagePack, each raw and compressed as the middleware
+would send it.
+
+Usage: python -m benchmarks.encoding [--scale N] [--repeat N]
+"""
+import argparse
+import csv
+import gzip
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Callable, List
+
+import brotli
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.encoding import MsgPackResponse, compact_restaurant
+from app.core.time_parser import parse_hours_string
+from app.schemas import restaurant as schemas
+
+
+def load_restaurants(path: str, scale: int) -> List[SimpleNamespace]:
+    """Restaurant-like objects from the CSV, repeated `scale` times"""
+    with open(path, "r") as file:
+        rows = list(csv.DictReader(file))
+
+    restaurants = []
+    for copy in range(scale):
+        for row in rows:
+            restaurant_id = uuid.uuid4()
+            hours = [
+                SimpleNamespace(
+                    id=uuid.uuid4(),
+                    restaurant_id=restaurant_id,
+                    day_of_week=entry.day_of_week,
+                    open_time=entry.open_time,
+                    close_time=entry.close_time,
+                )
+                for entry in parse_hours_string(row["Hours"])
+            ]
+            name = row["Restaurant Name"] + (f" #{copy}" if copy else "")
+            restaurants.append(SimpleNamespace(id=restaurant_id, name=name, hours=hours))
+    return restaurants
+
+
+def time_per_call(func: Callable[[], bytes], repeat: int) -> float:
+    """Average microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="restaurants.csv")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the catalog")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    restaurants = load_restaurants(args.csv, args.scale)
+    adapter = TypeAdapter(List[schemas.Restaurant])
+
+    # What FastAPI does for the response_model path
+    def encode_json() -> bytes:
+        models = adapter.validate_python(restaurants, from_attributes=True)
+        return JSONResponse(jsonable_encoder(models)).body
+
+    def encode_msgpack() -> bytes:
+        return MsgPackResponse([compact_restaurant(r) for r in restaurants]).body
+
+    json_body = encode_json()
+    msgpack_body = encode_msgpack()
+    # Same settings as the compression middleware
+    compressors = {
+        "": lambda body: body,
+        "+gzip": lambda body: gzip.compress(body, compresslevel=9),
+        "+br": lambda body: brotli.compress(body, quality=4, mode=brotli.MODE_TEXT),
+    }
+
+    print(f"{len(restaurants)} restaurants, {args.repeat} runs each")
+    print(f"{'encoding':<16}{'bytes':>10}{'encode us':>14}")
+    for name, encode, body in [
+        ("json", encode_json, json_body),
+        ("msgpack", encode_msgpack, msgpack_body),
+    ]:
+        for suffix, compress in compressors.items():
+            size = len(compress(body))
+            cpu = time_per_call(lambda: compress(encode()), args.repeat)
+            print(f"{name + suffix:<16}{size:>10}{cpu:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from collections import Counter
+import pytest
+from app.core.config import settings
+from app.core.time_parser import MINUTES_PER_WEEK
+from app.services import cache as cache_service
+from app.services import cache_warmer
+
+
+@pytest.fixture
+def fast_warmer(monkeypatch):
+    """Warm in large, unthrottled batches"""
+    monkeypatch.setattr(settings, "CACHE_WARM_BATCH_SIZE", 5000)
+    monkeypatch.setattr(settings, "CACHE_WARM_BATCHES_PER_SECOND", 1000.0)
+
+
+def test_warm_all_buckets(client, overnight_restaurant, fast_warmer, monkeypatch):
+    """Test that warming fills buckets that were never requested"""
+    monkeypatch.setattr(settings, "CACHE_WARM_ALL_BUCKETS", True)
+    assert cache_warmer.warm_cache() == MINUTES_PER_WEEK
+
+    # Saturday's overnight hours wrap into Sunday morning
+    cache_response = client.get("/api/v1/debug/cache/2024-03-17T01:30:00")
+    assert cache_response.json()["is_cached"] == True
+    assert cache_response.json()["cached_data"] == [overnight_restaurant["name"]]
+
+    cache_response = client.get("/api/v1/debug/cache/2024-03-17T12:00:00")
+    assert cache_response.json()["cached_data"] == []
+
+
+def test_warm_recent_requests_first(client, test_restaurant, fast_warmer, monkeypatch):
+    """Test that only requested buckets are warmed when not warming the whole week"""
+    monkeypatch.setattr(settings, "CACHE_WARM_ALL_BUCKETS", False)
+    monkeypatch.setattr(cache_warmer, "_requests", Counter())
+    client.get("/api/v1/restaurants/open?datetime=2024-03-15T15:00:00")
+    client.post("/api/v1/debug/clear-cache")
+
+    assert cache_warmer.warm_cache() == 1
+    cache_response = client.get("/api/v1/debug/cache/2024-03-15T15:00:30")
+    assert cache_response.json()["cached_data"] == [test_restaurant["name"]]
+
+    cache_response = client.get("/api/v1/debug/cache/2024-03-15T16:00:00")
+    assert cache_response.json()["is_cached"] == False
+
+
+def test_warm_stops_when_data_changes(client, test_restaurant, fast_warmer, monkeypatch):
+    """Test that a pass computed before a write never repopulates the cache"""
+    monkeypatch.setattr(settings, "CACHE_WARM_ALL_BUCKETS", True)
+    monkeypatch.setattr(settings, "CACHE_WARM_BATCH_SIZE", 100)
+    real_write = cache_service.set_cached_restaurants_many
+    calls = []
+
+    def write_then_change(results, version):
+        calls.append(version)
+        if len(calls) == 1:
+            # Another worker commits a change while the first batch is in flight
+            cache_service.bump_data_version()
+        return real_write(results, version)
+
+    monkeypatch.setattr(cache_service, "set_cached_restaurants_many", write_then_change)
+    assert cache_warmer.warm_cache() == 0
+    assert len(calls) == 1
+    # The pass queued a fresh one
+    assert cache_warmer._wake.is_set()
+    cache_warmer._wake.clear()
+
+    cache_response = client.get("/api/v1/debug/cache/2024-03-17T00:00:00")
+    assert cache_response.json()["is_cached"] == False
@@ -0,0 +1,90 @@
+import pytest
+from app.core.config import settings
+
+
+def write_csv(path, rows):
+    lines = ['"Restaurant Name","Hours"'] + [f'"{name}","{hours}"' for name, hours in rows]
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def csv_path(monkeypatch, tmp_path):
+    """Point the CSV feed at a temporary file"""
+    path = tmp_path / "restaurants.csv"
+    write_csv(
+        path,
+        [
+            ("Day Cafe", "Mon-Sun 11:00 am - 10:00 pm"),
+            ("Night Owl Restaurant", "Mon-Sun 5:00 pm - 2:00 am"),
+        ],
+    )
+    monkeypatch.setattr(settings, "CSV_PATH", str(path))
+    return path
+
+
+def test_sync_inserts_then_noop(client, csv_path):
+    """Test that a second sync of an unchanged feed does nothing"""
+    result = client.post("/api/v1/admin/sync-csv").json()
+    assert result["inserted"] == 2
+
+    result = client.post("/api/v1/admin/sync-csv").json()
+    assert result["inserted"] == 0
+    assert result["updated"] == 0
+    assert result["unchanged"] == 2
+
+
+def test_sync_updates_changed_hours(client, csv_path):
+    """Test that changed hours for an existing restaurant are applied"""
+    client.post("/api/v1/admin/sync-csv")
+    write_csv(
+        csv_path,
+        [
+            ("Day Cafe", "Mon-Sun 7:00 am - 3:00 pm"),
+            ("Night Owl Restaurant", "Mon-Sun 5:00 pm - 2:00 am"),
+        ],
+    )
+
+    result = client.post("/api/v1/admin/sync-csv").json()
+    assert result["updated"] == 1
+    assert result["unchanged"] == 1
+
+    response = client.get("/api/v1/restaurants/open?datetime=2024-03-15T08:00:00")
+    assert "Day Cafe" in response.json()
+
+
+def test_sync_deletes_only_feed_restaurants(client, csv_path, test_restaurant):
+    """Test that removed rows are deleted but API-created restaurants are kept"""
+    client.post("/api/v1/admin/sync-csv")
+    write_csv(csv_path, [("Day Cafe", "Mon-Sun 11:00 am - 10:00 pm")])
+
+    result = client.post("/api/v1/admin/sync-csv").json()
+    assert result["deleted"] == 1
+
+    names = [r["name"] for r in client.get("/api/v1/restaurants/").json()]
+    assert sorted(names) == ["Day Cafe", test_restaurant["name"]]
+
+
+def test_sync_invalidates_only_changed_buckets(client, csv_path):
+    """Test that cache entries whose result is unchanged survive a sync"""
+    client.post("/api/v1/admin/sync-csv")
+    # Friday 12:00 (Day Cafe only), 17:30 and 23:00 (Night Owl)
+    client.get("/api/v1/restaurants/open?datetime=2024-03-15T12:00:00")
+    client.get("/api/v1/restaurants/open?datetime=2024-03-15T17:30:00")
+    client.get("/api/v1/restaurants/open?datetime=2024-03-15T23:00:00")
+
+    write_csv(
+        csv_path,
+        [
+            ("Day Cafe", "Mon-Sun 11:00 am - 10:00 pm"),
+            ("Night Owl Restaurant", "Mon-Sun 6:00 pm - 2:00 am"),
+        ],
+    )
+    client.post("/api/v1/admin/sync-csv")
+
+    cache_response = client.get("/api/v1/debug/cache/2024-03-15T12:00:00")
+    assert cache_response.json()["is_cached"] == True
+    # Night Owl is open at 23:00 before and after the change
+    cache_response = client.get("/api/v1/debug/cache/2024-03-15T23:00:00")
+    assert cache_response.json()["is_cached"] == True
+    cache_response = client.get("/api/v1/debug/cache/2024-03-15T17:30:00")
+    assert cache_response.json()["is_cached"] == False
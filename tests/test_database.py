@@ -0,0 +1,40 @@
+import threading
+import time
+from app.db import models
+from tests.conftest import TestingSessionLocal
+
+
+def test_concurrent_sessions_keep_writes(test_db):
+    """Test that a session closed in another thread doesn't roll back a pending write"""
+    writer = TestingSessionLocal()
+    started = threading.Event()
+    counts = []
+
+    def read_and_close():
+        started.set()
+        reader = TestingSessionLocal()
+        try:
+            counts.append(reader.query(models.Restaurant).count())
+        finally:
+            reader.close()
+
+    try:
+        writer.add(models.Restaurant(name="Test Restaurant"))
+        writer.flush()
+        reader_thread = threading.Thread(target=read_and_close)
+        reader_thread.start()
+        started.wait(timeout=5)
+        # Let the reader run (or block) while the write is still uncommitted
+        time.sleep(0.2)
+        writer.commit()
+        reader_thread.join(timeout=5)
+    finally:
+        writer.close()
+
+    # The reader never sees the uncommitted row
+    assert counts == [0]
+    check = TestingSessionLocal()
+    try:
+        assert check.query(models.Restaurant).count() == 1
+    finally:
+        check.close()
@@ -0,0 +1,100 @@
+import pytest
+import msgpack
+from starlette.requests import Request
+from app.api.encoding import wants_msgpack
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def test_list_restaurants_msgpack(client, overnight_restaurant):
+    """Test the compact MessagePack encoding of the restaurant list"""
+    response = client.get("/api/v1/restaurants/", headers=MSGPACK)
+    assert response.headers["content-type"] == "application/msgpack"
+
+    restaurants = msgpack.unpackb(response.content)
+    assert len(restaurants) == 1
+    assert restaurants[0]["name"] == overnight_restaurant["name"]
+    assert len(restaurants[0]["id"]) == 16
+    assert restaurants[0]["timezone"] == "America/New_York"
+
+    # Saturday 5 pm - 2 am runs past the end of the week
+    assert sorted(restaurants[0]["hours"])[-1] == [6 * 1440 + 17 * 60, 7 * 1440 + 120]
+
+
+def test_open_restaurants_msgpack(client, test_restaurant):
+    """Test content negotiation on the open restaurants endpoint"""
+    url = "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00"
+    response = client.get(url, headers=MSGPACK)
+    assert msgpack.unpackb(response.content) == [test_restaurant["name"]]
+
+    response = client.get(url, headers={"Accept": "application/msgpack;q=0"})
+    assert response.json() == [test_restaurant["name"]]
+
+
+def test_large_responses_compressed(client):
+    """Test brotli/gzip compression above the size threshold only"""
+    for i in range(20):
+        client.post(
+            "/api/v1/restaurants/",
+            json={"name": f"Restaurant {i}", "hours": "Mon-Sun 11:00 am - 10:00 pm"},
+        )
+
+    response = client.get("/api/v1/restaurants/", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 20
+
+    response = client.get("/api/v1/restaurants/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+    response = client.get(
+        "/api/v1/restaurants/open?datetime=2024-03-15T03:00:00",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/restaurants/",
+        "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00",
+        "/api/v1/restaurants/occupancy",
+        "/api/v1/restaurants/timeline?start=2024-03-15T00:00:00&end=2024-03-16T00:00:00",
+    ],
+)
+def test_negotiated_responses_vary_on_accept(client, test_restaurant, url):
+    """Test that JSON and MessagePack responses both carry Vary: Accept"""
+    for headers in ({}, MSGPACK):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        vary = [value.strip() for value in response.headers["vary"].split(",")]
+        assert "Accept" in vary
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/json;q=0.5, application/msgpack", True),
+        ("application/msgpack, */*;q=0.8", True),
+        ("application/json, application/msgpack;q=0.1", False),
+        ("application/msgpack, */*", False),
+        ("application/msgpack;q=0", False),
+        ("*/*", False),
+        ("", False),
+    ],
+)
+def test_wants_msgpack_compares_q_values(accept, expected):
+    """Test that MessagePack is only chosen when preferred to JSON"""
+    request = Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+    assert wants_msgpack(request) == expected
+
+
+def test_json_preferred_by_q_value(client, test_restaurant):
+    """Test that a lower q for MessagePack gets JSON"""
+    response = client.get(
+        "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00",
+        headers={"Accept": "application/json, application/msgpack;q=0.1"},
+    )
+    assert response.headers["content-type"] == "application/json"
@@ -1,39 +1,3 @@
-import pytest
-
-
-@pytest.fixture
-def test_restaurant(client):
-    """Create a test restaurant with standard hours"""
-    response = client.post(
-        "/api/v1/restaurants/",
-        json={"name": "Test Restaurant", "hours": "Mon-Sun 11:00 am - 10:00 pm"},
-    )
-    return response.json()
-
-
-@pytest.fixture
-def overnight_restaurant(client):
-    """Create a restaurant with overnight hours"""
-    response = client.post(
-        "/api/v1/restaurants/",
-        json={"name": "Night Owl Restaurant", "hours": "Mon-Sun 5:00 pm - 2:00 am"},
-    )
-    return response.json()
-
-
-@pytest.fixture
-def complex_hours_restaurant(client):
-    """Create a restaurant with different hours on different days"""
-    response = client.post(
-        "/api/v1/restaurants/",
-        json={
-            "name": "Complex Hours Restaurant",
-            "hours": "Mon-Thu 11:00 am - 10:00 pm / Fri-Sat 11:00 am - 1:30 am / Sun 10:00 am - 9:00 pm",
-        },
-    )
-    return response.json()
-
-
 def test_regular_hours(client, test_restaurant):
     """Test regular business hours"""
     # Test just after opening
@@ -130,6 +94,28 @@ def test_cache_behavior(client, test_restaurant):
     assert cache_response.json()["is_cached"] == False
 
 
+def test_lookup_racing_a_write_is_not_cached(client, test_restaurant, monkeypatch):
+    """Test that a result computed before a data change is not cached after it"""
+    from app.services import cache as cache_service
+    from app.services import restaurant as restaurant_service
+
+    real_lookup = restaurant_service.get_open_restaurants
+
+    def lookup_then_change(db, datetime):
+        result = real_lookup(db, datetime)
+        # Another worker commits a change before this result is cached
+        cache_service.bump_data_version()
+        return result
+
+    monkeypatch.setattr(restaurant_service, "get_open_restaurants", lookup_then_change)
+    datetime_str = "2024-03-15T15:00:00"
+    response = client.get(f"/api/v1/restaurants/open?datetime={datetime_str}")
+    assert response.json() == ["Test Restaurant"]
+
+    cache_response = client.get(f"/api/v1/debug/cache/{datetime_str}")
+    assert cache_response.json()["is_cached"] == False
+
+
 def test_create_restaurant(client):
     """Test creating a restaurant"""
     response = client.post(
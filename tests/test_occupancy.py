@@ -0,0 +1,48 @@
+def test_weekly_occupancy(client, test_restaurant, overnight_restaurant):
+    """Test hourly open counts across the week, including overnight wrap"""
+    response = client.get("/api/v1/restaurants/occupancy?slot_minutes=60")
+    assert response.status_code == 200
+    counts = response.json()["counts"]
+    assert len(counts) == 168
+
+    # Sunday 01:00 is still covered by Saturday's overnight hours
+    assert counts[1] == 1
+    # Sunday 05:00, nothing open
+    assert counts[5] == 0
+    # Friday 19:00, both open
+    assert counts[5 * 24 + 19] == 2
+
+
+def test_weekly_occupancy_invalid_slot(client):
+    """Test slot sizes that do not divide a day"""
+    response = client.get("/api/v1/restaurants/occupancy?slot_minutes=7")
+    assert response.status_code == 400
+
+
+def test_timeline_events(client, test_restaurant, overnight_restaurant):
+    """Test delta-encoded open/close events over a date range"""
+    response = client.get(
+        "/api/v1/restaurants/timeline"
+        "?start=2024-03-15T10:00:00&end=2024-03-16T03:00:00&slot_minutes=60"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["slot_count"] == 17
+    assert data["initial"] == []
+
+    events = [(e["slot"], e["opened"], e["closed"]) for e in data["events"]]
+    assert events == [
+        (1, [test_restaurant["name"]], []),
+        (7, [overnight_restaurant["name"]], []),
+        (12, [], [test_restaurant["name"]]),
+        (16, [], [overnight_restaurant["name"]]),
+    ]
+
+
+def test_timeline_invalid_range(client):
+    """Test a range that ends before it starts"""
+    response = client.get(
+        "/api/v1/restaurants/timeline"
+        "?start=2024-03-16T00:00:00&end=2024-03-15T00:00:00"
+    )
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+import threading
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.db import query_log
+from app.db.database import engine
+
+requires_postgres = pytest.mark.skipif(
+    settings.DATABASE_BACKEND != "postgres", reason="EXPLAIN and index stats need PostgreSQL"
+)
+
+
+@pytest.fixture
+def log_all_queries(monkeypatch):
+    """Treat every statement as slow and start from an empty log"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    query_log.clear_slow_queries()
+    yield
+    query_log.wait_for_explains()
+    query_log.clear_slow_queries()
+
+
+@requires_postgres
+def test_slow_query_recorded_with_plan(client, test_restaurant, log_all_queries):
+    """Test that slow statements are logged and get an EXPLAIN plan"""
+    client.get("/api/v1/restaurants/open?datetime=2024-03-15T15:00:00&use_cache=false")
+    query_log.wait_for_explains()
+
+    queries = client.get("/api/v1/debug/slow-queries").json()["queries"]
+    open_queries = [
+        q for q in queries if "restaurant_hours.day_of_week" in q["statement"]
+    ]
+    assert open_queries
+    assert open_queries[0]["parameters"]
+    assert open_queries[0]["plan"] is not None
+    assert open_queries[0]["plan"][0]["Plan"]["Actual Total Time"] >= 0
+
+
+def test_slow_query_threshold(client, test_restaurant):
+    """Test that fast statements stay out of the log"""
+    query_log.clear_slow_queries()
+    client.get("/api/v1/restaurants/")
+    assert client.get("/api/v1/debug/slow-queries").json()["queries"] == []
+
+
+@requires_postgres
+def test_index_usage_report(client, test_restaurant):
+    """Test that the report covers the hours indexes"""
+    response = client.get("/api/v1/debug/index-usage")
+    assert response.status_code == 200
+    indexes = {i["index"] for i in response.json()["indexes"]}
+    assert {
+        "idx_restaurant_hours_lookup",
+        "idx_hours_search",
+        "idx_hours_time_range",
+        "idx_hours_time_range_close",
+        "idx_hours_full_search",
+    } <= indexes
+
+
+def test_only_plain_reads_are_analyzed():
+    """Test that statements with side effects never get EXPLAIN ANALYZE"""
+    assert query_log._is_plain_read(
+        "SELECT restaurants.name FROM restaurants JOIN restaurant_hours "
+        "ON restaurants.id = restaurant_hours.restaurant_id "
+        "WHERE restaurant_hours.day_of_week IN (%(day_1)s, %(day_2)s)"
+    )
+    assert query_log._is_plain_read(
+        "SELECT min(restaurant_utc_hours.valid_from) FROM restaurant_utc_hours"
+    )
+    assert not query_log._is_plain_read("SELECT pg_advisory_lock(%(id)s)")
+    assert not query_log._is_plain_read("SELECT nextval('restaurants_id_seq')")
+    assert not query_log._is_plain_read("SELECT * FROM restaurants FOR UPDATE")
+    assert not query_log._is_plain_read("SELECT * FROM pg_stat_user_tables")
+    assert not query_log._is_plain_read("DELETE FROM restaurants")
+
+
+@requires_postgres
+def test_explain_never_holds_advisory_locks(client, log_all_queries):
+    """Test that logging lock calls leaves no advisory lock behind"""
+    restaurant = {"name": "Lock Cafe", "hours": "Mon-Sun 11:00 am - 10:00 pm"}
+    assert client.post("/api/v1/restaurants/", json=restaurant).status_code == 200
+    assert client.put("/api/v1/restaurants/Lock Cafe", json=restaurant).status_code == 200
+    query_log.wait_for_explains()
+
+    lock_queries = [
+        q for q in query_log.get_slow_queries() if "pg_advisory_lock" in q["statement"]
+    ]
+    assert lock_queries
+    for query in lock_queries:
+        assert "Actual Total Time" not in query["plan"][0]["Plan"]
+
+    # A leaked lock would make the next update wait forever
+    responses = []
+    update = threading.Thread(
+        target=lambda: responses.append(
+            client.put("/api/v1/restaurants/Lock Cafe", json=restaurant)
+        ),
+        daemon=True,
+    )
+    update.start()
+    update.join(timeout=10)
+    assert responses and responses[0].status_code == 200
+
+    with engine.connect() as conn:
+        held = conn.execute(
+            text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")
+        ).scalar()
+    assert held == 0
@@ -0,0 +1,138 @@
+import pytest
+from app.core.config import settings
+from app.services import schedule_index
+
+
+@pytest.fixture
+def schedule_index_path(monkeypatch, tmp_path):
+    """Enable the shared schedule index under a temporary path"""
+    path = str(tmp_path / "liine-schedule")
+    monkeypatch.setattr(settings, "SCHEDULE_INDEX_PATH", path)
+    monkeypatch.setattr(schedule_index, "_rebuild_started_at", None)
+    return path
+
+
+def test_index_published_on_write(client, schedule_index_path):
+    """Test that creating a restaurant publishes a new index generation"""
+    response = client.get("/api/v1/debug/schedule-index")
+    assert response.json()["generation"] is None
+
+    client.post(
+        "/api/v1/restaurants/",
+        json={"name": "Night Owl Restaurant", "hours": "Mon-Sun 5:00 pm - 2:00 am"},
+    )
+
+    status = client.get("/api/v1/debug/schedule-index").json()
+    assert status["enabled"] == True
+    assert status["generation"] == 1
+    assert status["restaurant_count"] == 1
+
+
+def test_index_overnight_hours(client, schedule_index_path):
+    """Test that index lookups match the database for overnight hours"""
+    client.post(
+        "/api/v1/restaurants/",
+        json={"name": "Night Owl Restaurant", "hours": "Mon-Sun 5:00 pm - 2:00 am"},
+    )
+
+    for datetime_str, expected in [
+        ("2024-03-15T20:00:00", True),
+        ("2024-03-16T01:30:00", True),
+        ("2024-03-16T02:00:00", False),
+        ("2024-03-16T16:59:00", False),
+    ]:
+        response = client.get(
+            f"/api/v1/restaurants/open?datetime={datetime_str}&use_cache=false"
+        )
+        assert ("Night Owl Restaurant" in response.json()) == expected
+
+
+def test_index_swapped_on_delete(client, schedule_index_path):
+    """Test that workers switch to the new generation after a delete"""
+    client.post(
+        "/api/v1/restaurants/",
+        json={"name": "Test Restaurant", "hours": "Mon-Sun 11:00 am - 10:00 pm"},
+    )
+    datetime_str = "2024-03-15T15:00:00"
+    response = client.get(
+        f"/api/v1/restaurants/open?datetime={datetime_str}&use_cache=false"
+    )
+    assert "Test Restaurant" in response.json()
+
+    client.delete("/api/v1/restaurants/Test Restaurant")
+
+    response = client.get(
+        f"/api/v1/restaurants/open?datetime={datetime_str}&use_cache=false"
+    )
+    assert response.json() == []
+    assert client.get("/api/v1/debug/schedule-index").json()["generation"] == 2
+
+
+def test_index_and_database_agree_on_order(client, schedule_index_path, monkeypatch):
+    """Test that names come back in the same order whichever path answers"""
+    for name in ("alpha Cafe", "Beta Bistro", "Étoile", "zeta Bar"):
+        client.post(
+            "/api/v1/restaurants/",
+            json={"name": name, "hours": "Mon-Sun 11:00 am - 10:00 pm"},
+        )
+    url = "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00&use_cache=false"
+    from_index = client.get(url).json()
+
+    monkeypatch.setattr(settings, "SCHEDULE_INDEX_PATH", "")
+    from_database = client.get(url).json()
+    from_utc_schedule = client.get(
+        "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00-04:00"
+    ).json()
+
+    assert from_index == from_database == from_utc_schedule == sorted(from_index)
+    assert len(from_index) == 4
+
+
+def test_index_ignored_after_change_elsewhere(client, schedule_index_path, monkeypatch):
+    """Test that a generation older than the data version falls back to the database"""
+    client.post(
+        "/api/v1/restaurants/",
+        json={"name": "Test Restaurant", "hours": "Mon-Sun 11:00 am - 10:00 pm"},
+    )
+    assert client.get("/api/v1/debug/schedule-index").json()["current"] == True
+
+    with monkeypatch.context() as m:
+        # A worker in another pod writes: the version moves, this index doesn't
+        m.setattr(schedule_index, "rebuild_index", lambda db, blocking=True: None)
+        client.post(
+            "/api/v1/restaurants/",
+            json={"name": "Night Owl Restaurant", "hours": "Mon-Sun 5:00 pm - 2:00 am"},
+        )
+    status = client.get("/api/v1/debug/schedule-index").json()
+    assert status["generation"] == 1
+    assert status["current"] == False
+
+    url = "/api/v1/restaurants/open?datetime=2024-03-15T20:00:00&use_cache=false"
+    assert client.get(url).json() == ["Night Owl Restaurant", "Test Restaurant"]
+
+    # The stale lookup started a rebuild in this worker
+    schedule_index._rebuild_thread.join(timeout=5)
+    status = client.get("/api/v1/debug/schedule-index").json()
+    assert status["generation"] == 2
+    assert status["current"] == True
+    assert client.get(url).json() == ["Night Owl Restaurant", "Test Restaurant"]
+
+
+def test_failed_rebuild_disables_index(client, schedule_index_path, monkeypatch):
+    """Test that lookups fall back to the database when a rebuild fails"""
+    client.post(
+        "/api/v1/restaurants/",
+        json={"name": "Test Restaurant", "hours": "Mon-Sun 11:00 am - 10:00 pm"},
+    )
+    assert client.get("/api/v1/debug/schedule-index").json()["generation"] == 1
+
+    def broken_hours_rows(db):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(schedule_index.restaurant_service, "get_hours_rows", broken_hours_rows)
+    client.delete("/api/v1/restaurants/Test Restaurant")
+
+    assert client.get("/api/v1/debug/schedule-index").json()["generation"] is None
+    url = "/api/v1/restaurants/open?datetime=2024-03-15T15:00:00&use_cache=false"
+    assert client.get(url).json() == []
+    schedule_index._rebuild_thread.join(timeout=5)
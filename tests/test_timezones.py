@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+import pytest
+from app.services import utc_schedule
+from tests.conftest import TestingSessionLocal
+
+# New York moves from UTC-5 to UTC-4 at 2024-03-10 07:00 UTC
+NEW_YORK_DST = datetime(2024, 3, 10, 7, 0)
+
+
+@pytest.fixture(autouse=True)
+def fixed_now(monkeypatch):
+    """Center the precomputed UTC schedule on the March 2024 DST transition"""
+    monkeypatch.setattr(utc_schedule, "_now", lambda: datetime(2024, 3, 1))
+
+
+def open_at(client, when):
+    response = client.get("/api/v1/restaurants/open", params={"datetime": when})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def pacific_restaurant(client):
+    """Create a restaurant with standard hours in Los Angeles"""
+    response = client.post(
+        "/api/v1/restaurants/",
+        json={
+            "name": "Pacific Restaurant",
+            "hours": "Mon-Sun 11:00 am - 10:00 pm",
+            "timezone": "America/Los_Angeles",
+        },
+    )
+    return response.json()
+
+
+def test_offset_segments_split_at_dst():
+    """Test that the schedule horizon is cut at the DST transition"""
+    segments = utc_schedule.offset_segments(
+        "America/New_York", datetime(2024, 3, 1), datetime(2024, 4, 1)
+    )
+    assert segments == (
+        (datetime(2024, 3, 1), NEW_YORK_DST, -300),
+        (NEW_YORK_DST, datetime(2024, 4, 1), -240),
+    )
+
+
+def test_offset_segments_transition_in_last_step():
+    """Test that a transition in the final probe step of the horizon is found"""
+    segments = utc_schedule.offset_segments(
+        "America/New_York", datetime(2024, 3, 9, 6, 30), datetime(2024, 3, 10, 7, 30)
+    )
+    assert segments == (
+        (datetime(2024, 3, 9, 6, 30), NEW_YORK_DST, -300),
+        (NEW_YORK_DST, datetime(2024, 3, 10, 7, 30), -240),
+    )
+
+
+def test_offset_segments_transition_at_end():
+    """Test that a transition exactly at the end of the horizon adds no empty span"""
+    segments = utc_schedule.offset_segments(
+        "America/New_York", datetime(2024, 3, 9, 7, 0), NEW_YORK_DST
+    )
+    assert segments == ((datetime(2024, 3, 9, 7, 0), NEW_YORK_DST, -300),)
+
+
+def test_default_timezone(test_restaurant):
+    """Test that restaurants created without a timezone get the default"""
+    assert test_restaurant["timezone"] == "America/New_York"
+
+
+def test_mixed_timezones(client, test_restaurant, pacific_restaurant):
+    """Test that an aware datetime is checked in each restaurant's own timezone"""
+    # 12:00 in New York, 09:00 in Los Angeles
+    assert open_at(client, "2024-03-08T17:00:00Z") == ["Test Restaurant"]
+    # 15:00 in New York, 12:00 in Los Angeles
+    assert open_at(client, "2024-03-08T20:00:00Z") == [
+        "Pacific Restaurant",
+        "Test Restaurant",
+    ]
+    # 23:30 in New York, 20:30 in Los Angeles
+    assert open_at(client, "2024-03-09T04:30:00Z") == ["Pacific Restaurant"]
+
+
+def test_lookup_uses_precomputed_schedule(client, test_restaurant):
+    """Test that the UTC schedule covers the horizon around now"""
+    status = client.get("/api/v1/debug/utc-schedule").json()
+    assert status["valid_from"] == "2024-02-23T00:00:00"
+    assert status["valid_until"] == "2024-04-26T00:00:00"
+    # 7 days, with Saturday split where it crosses into Sunday UTC, for each offset
+    assert status["rows"] == 16
+
+
+def test_opening_time_follows_dst(client, test_restaurant):
+    """Test that 11:00 local opening is 16:00 UTC before DST and 15:00 UTC after"""
+    assert open_at(client, "2024-03-09T15:30:00Z") == []
+    assert open_at(client, "2024-03-09T16:30:00Z") == ["Test Restaurant"]
+    assert open_at(client, "2024-03-11T14:30:00Z") == []
+    assert open_at(client, "2024-03-11T15:30:00Z") == ["Test Restaurant"]
+    assert open_at(client, "2024-03-11T11:30:00-04:00") == ["Test Restaurant"]
+
+
+def test_overnight_hours_across_dst(client, overnight_restaurant):
+    """Test overnight hours that close at the moment clocks go forward"""
+    # 01:30 EST, still open from Saturday night
+    assert open_at(client, "2024-03-10T06:30:00Z") == ["Night Owl Restaurant"]
+    # 03:30 EDT, closed
+    assert open_at(client, "2024-03-10T07:30:00Z") == []
+    # Sunday 16:30 and 17:30 EDT
+    assert open_at(client, "2024-03-10T20:30:00Z") == []
+    assert open_at(client, "2024-03-10T21:30:00Z") == ["Night Owl Restaurant"]
+
+
+def test_outside_horizon_converts_per_restaurant(client, test_restaurant):
+    """Test that datetimes outside the precomputed schedule are still answered"""
+    assert open_at(client, "2024-06-05T14:30:00Z") == []
+    assert open_at(client, "2024-06-05T15:30:00Z") == ["Test Restaurant"]
+
+
+def test_naive_datetime_uses_wall_clock(client, test_restaurant, pacific_restaurant):
+    """Test that naive datetimes are still compared with local hours as given"""
+    assert open_at(client, "2024-03-08T10:30:00") == []
+    assert open_at(client, "2024-03-08T12:00:00") == [
+        "Pacific Restaurant",
+        "Test Restaurant",
+    ]
+
+
+def test_update_timezone(client, test_restaurant):
+    """Test that changing a restaurant's timezone regenerates its schedule"""
+    response = client.put(
+        "/api/v1/restaurants/Test Restaurant",
+        json={
+            "name": "Test Restaurant",
+            "hours": "Mon-Sun 11:00 am - 10:00 pm",
+            "timezone": "America/Los_Angeles",
+        },
+    )
+    assert response.json()["timezone"] == "America/Los_Angeles"
+    assert open_at(client, "2024-03-08T17:00:00Z") == []
+    assert open_at(client, "2024-03-08T20:00:00Z") == ["Test Restaurant"]
+
+
+def test_invalid_timezone(client):
+    """Test that an unknown timezone is rejected"""
+    response = client.post(
+        "/api/v1/restaurants/",
+        json={
+            "name": "Nowhere Cafe",
+            "hours": "Mon-Sun 11:00 am - 10:00 pm",
+            "timezone": "Mars/Olympus_Mons",
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_refresh_when_horizon_runs_out(client, test_restaurant, monkeypatch):
+    """Test that the schedule is only rebuilt once half the future window is used"""
+    db = TestingSessionLocal()
+    try:
+        assert not utc_schedule.refresh(db)
+
+        later = datetime(2024, 3, 1) + timedelta(days=40)
+        monkeypatch.setattr(utc_schedule, "_now", lambda: later)
+        assert utc_schedule.refresh(db)
+        assert utc_schedule.horizon_bounds(db) == (
+            later - timedelta(days=7),
+            later + timedelta(days=56),
+        )
+    finally:
+        db.close()
+
+
+def test_timeline_uses_restaurant_timezones(client, test_restaurant, pacific_restaurant):
+    """Test that the timeline agrees with /restaurants/open for aware datetimes"""
+    response = client.get(
+        "/api/v1/restaurants/timeline",
+        params={
+            "start": "2024-03-15T12:00:00+00:00",
+            "end": "2024-03-15T19:00:00+00:00",
+            "slot_minutes": 60,
+        },
+    )
+    assert response.status_code == 200
+    timeline = response.json()
+    assert timeline["initial"] == open_at(client, "2024-03-15T12:00:00Z") == []
+    # 11:00 EDT is 15:00 UTC, 11:00 PDT is 18:00 UTC
+    assert [(e["slot"], e["opened"]) for e in timeline["events"]] == [
+        (3, ["Test Restaurant"]),
+        (6, ["Pacific Restaurant"]),
+    ]